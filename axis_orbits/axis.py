@@ -13,18 +13,40 @@ sys.path.append("utilities")
 from requirements import check_requirements
 check_requirements()
 
-from mat24_orbits import check_recompute, compute_orbits
+from mat24_orbits import check_recompute, SHELVE_NAME, ORBITS_STAGE
 from mat24_orbits import load_orbits, check_orbits, display_orbits
-from suborbits import check_monster_axes
 from display_suborbits import display_suborbit_table
 from check_all_suborbits import check_suborbits, print_input_for_gap
 from check_all_suborbits import call_gap
 from cleanup import remove_intermediate_files
+from stages import Stage, run_stages
+from scheduler import set_jobs, shared_pool, default_processes
+from trace_events import trace_to_file, span
 
 CERTIFICATE_PATH = os.path.join("certificates", "axis_certificate.txt")
 
 
 
+# Stages for computing the tables in the shelve, see file
+# utilities/stages.py. A stage is run only if its results are
+# missing or out of date.
+STAGES = [
+    ORBITS_STAGE,
+    Stage("suborbits", ("suborbits", "check_monster_axes"),
+        ["mat24_suborbits"], ["orbits"], [], {}),
+    Stage("orbit_sizes", ("eigenvals_monster", "compute_orbits"),
+        ["ORBIT_SIZES"], ["orbits", "suborbits"], [], {}),
+    Stage("watermarks", ("watermark_suborbits", "watermark_suborbits"),
+        ["MAP_SUBORBIT", "SUBORBIT_REPRESENTATIVES", "SUBORBIT_SIZES",
+        "SUBORBIT_CENTRALIZERS"], ["orbits", "orbit_sizes"], [], {}),
+    Stage("centralizer_orders", ("centralizer_orders", "centralizer_orders"),
+        ["ORBIT_CENTRALIZERS"], ["orbits", "orbit_sizes"], [], {}),
+    Stage("check_suborbits", ("check_all_suborbits", "check_suborbits"),
+        ["SUBORBIT_SIZES_2"], ["orbits", "watermarks"], [],
+        {"check": True, "verbose": False}),
+]
+
+
 def parse_args():
     description = ('Display information about G_x0 '
     'orbits of 2A axes. ' 
@@ -61,6 +83,14 @@ def parse_args():
     parser.add_argument("--show-suborbits",  dest="show_suborbits",
         action="store_true",
         help = "Display suborbit diagram for G_x0 orbits of axes")
+    parser.add_argument("-j", "--jobs",  dest="jobs", type=int,
+        default=None, metavar="N",
+        help="Use N processes for computing (default depends on CPUs)")
+    parser.add_argument("--gap",  dest="gap", action="store_true",
+        help="Compute structures of centralizers missing in GAP output")
+    parser.add_argument("--trace",  dest="trace",
+        default=None, metavar="FILE",
+        help="Write a trace of the computation to FILE (Chrome format)")
     parser.add_argument("-r",  dest="recompute", action="store_true",
         help="Recompute all precomputed data")
     parser.add_argument("-t",  dest="latex", action="store_true",
@@ -86,61 +116,61 @@ if __name__ == "__main__":
     d_all = options.all
     if options.recompute:
         remove_intermediate_files()
-    recompute = check_recompute(options.recompute)
-    if recompute:
-        start_time = time.time()
-        new_block(recompute)
-        d = compute_orbits(n_generators = 10, store = True)
-        check_monster_axes()
-        from eigenvals_monster import compute_orbits
-        compute_orbits()
-        from watermark_suborbits import watermark_suborbits
-        watermark_suborbits()
-        from centralizer_orders import centralizer_orders
-        centralizer_orders()
-        check_suborbits(check = True, verbose = False)
-        t = time.time() - start_time
-        T = "Run time for generating tables: %.2f s"
-        print(T % t)
-        print_input_for_gap()
-        gap_ok = call_gap()
-    d = load_orbits()   
-    check_orbits(d)
-    if d_all or options.show_Gx0_cent:
-        new_block(all or options.show_Gx0_cent)
-        display_orbits(d)
-    if d_all or options.show_suborbits:
-        new_block(all or options.show_suborbits)
-        from display_suborbits import display_suborbit_table
-        display_suborbit_table(options.latex)
-    if d_all or options.show_Gx0_orbits:
-        new_block(all or options.show_G_x0_suborbits)
-        from eigenvals_monster import show_eigenvals
-        show_eigenvals(options.latex, Nxyz=True)
-    if d_all or options.show_Gx0_orders:
-        new_block(all or options.show_G_x0_orders)
-        from centralizer_orders import centralizer_orders
-        centralizer_orders(recompute = False, verbose = 1)
-
-    if d_all or options.show_Nx0_orbits:
-        new_block(all or options.show_N_x0_orbits)
-        check_suborbits(check = False, verbose = True)
-    if d_all or options.show_N0_orbits:
-        new_block(all or options.show_N0_orbits)
-        from display_N0_suborbits import display_N0_orbits
-        display_N0_orbits(options.latex)
-    if d_all or options.show_Nxyz_orbits:
-        new_block(all or options.show_Nxyz_orbits)
-        from display_N0_suborbits import display_Nxyz_orbits
-        display_Nxyz_orbits(options.latex)
-    if d_all or options.make_cert:
-        new_block(all or options.make_cert)
-        from make_certificate import make_certificate
-        make_certificate(CERTIFICATE_PATH)
-    if d_all or options.check_cert:
-        new_block(all or options.check_cert)
-        from certificates.check_axis_certificate import check_certificate
-        check_certificate(CERTIFICATE_PATH)
-       
-
+    check_recompute(options.recompute)
+    set_jobs(options.jobs)
+    with trace_to_file(options.trace):
+        with shared_pool():
+            start_time = time.time()
+            stages = run_stages(SHELVE_NAME, STAGES)
+            if len(stages) or options.gap:
+                new_block(True)
+                if len(stages):
+                    t = time.time() - start_time
+                    T = "Run time for generating tables: %.2f s"
+                    print(T % t)
+                print_input_for_gap()
+                with span("GAP", "step"):
+                    gap_ok = call_gap()
+                if not gap_ok:
+                    print("Please run this script again with option "
+                        "--gap for computing the missing structures")
+            d = load_orbits()   
+            check_orbits(d)
+            if d_all or options.show_Gx0_cent:
+                new_block(all or options.show_Gx0_cent)
+                display_orbits(d)
+            if d_all or options.show_suborbits:
+                new_block(all or options.show_suborbits)
+                from display_suborbits import display_suborbit_table
+                display_suborbit_table(options.latex)
+            if d_all or options.show_Gx0_orbits:
+                new_block(all or options.show_G_x0_suborbits)
+                from eigenvals_monster import show_eigenvals
+                show_eigenvals(options.latex, Nxyz=True)
+            if d_all or options.show_Gx0_orders:
+                new_block(all or options.show_G_x0_orders)
+                from centralizer_orders import centralizer_orders
+                centralizer_orders(recompute = False, verbose = 1)
 
+            if d_all or options.show_Nx0_orbits:
+                new_block(all or options.show_N_x0_orbits)
+                check_suborbits(check = False, verbose = True)
+            if d_all or options.show_N0_orbits:
+                new_block(all or options.show_N0_orbits)
+                from display_N0_suborbits import display_N0_orbits
+                display_N0_orbits(options.latex)
+            if d_all or options.show_Nxyz_orbits:
+                new_block(all or options.show_Nxyz_orbits)
+                from display_N0_suborbits import display_Nxyz_orbits
+                display_Nxyz_orbits(options.latex)
+            if d_all or options.make_cert:
+                new_block(all or options.make_cert)
+                from make_certificate import make_certificate
+                with span("make certificate", "step"):
+                    make_certificate(CERTIFICATE_PATH)
+        if d_all or options.check_cert:
+            new_block(all or options.check_cert)
+            from certificates.check_axis_certificate import check_certificate
+            with span("check certificate", "step"):
+                check_certificate(CERTIFICATE_PATH, mp = True,
+                    processes = default_processes())
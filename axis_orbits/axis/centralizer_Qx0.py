@@ -1,6 +1,6 @@
 import sys
 import os
-from collections import defaultdict, OrderedDict
+from collections import OrderedDict
 import numpy as np
 
 from mmgroup import MM0, XLeech2, leech2_orbits_raw, mat24, MM
@@ -12,37 +12,64 @@ from mmgroup.axes import Axis
 AXES = Axis.representatives()
 
 
-
+# We keep the vectors ``v * x_0(i)`` in the table of function
+# ``centralize_axis_Qx0`` if there are at most MAX_STORED_VECTORS
+# different such vectors. Otherwise we store their indices only.
+MAX_STORED_VECTORS = 256
 
 
 def centralize_axis_Qx0(axis):
+    """Count the pairs of transformed axes that are equal
+
+    Let ``v`` be the vector ``axis.v15``. Let ``x_0(i) = x_i``
+    for ``0 <= i < 2^12``, and ``x_1(i) = x_{i * 2^12}`` for
+    ``0 <= i < 2^13``, where ``x_j`` is the element of Q_x0 with
+    number ``j``. The function counts the pairs ``(i, j)`` with
+    ``v * x_0(i) == v * x_1(j)``.
+
+    This is a hash join of the two lists of transformed vectors on
+    the hash values returned by method ``hash`` of the vectors. If
+    hash values agree then the vectors are compared exactly. Storing
+    all vectors ``v * x_0(i)`` would require too much memory; so
+    we store the vector ``v * x_0(i)`` only if there are at most
+    MAX_STORED_VECTORS different such vectors. Otherwise the vector
+    is recomputed whenever its hash value is found.
+    """
     v15 = axis.v15
-    ax0 = [v15 * MM(XLeech2(i)) for i in range(1 << 12)]
-    ax1 = [v15 * MM(XLeech2(i)) for i in range(0, 1 << 25, 1 << 12)]
-    hashes = defaultdict(lambda : ([], []))
-    for ax in ax0:
-        h = hashes[ax.hash()]
-        h[0].append(ax)
-    #print(".", end="", flush=True)
-    for ax in ax1:
-        h = hashes[ax.hash()]
-        h[1].append(ax)
-    #print(".", end="", flush=True)
-    for h, (a0, a1) in hashes.items():
-        if len(a0)  * len(a1):
-            # print(len(a0), len(a1))
-            pass
-        if len(a0) * len(a1) > 1 << 18:
-            return None
-    #print(".", end="", flush=True)
+    def ax0(i):
+        return v15 * MM(XLeech2(i))
+    def vector(entry):
+        return entry[2] if entry[2] is not None else ax0(entry[0])
+    # Map a hash value to a list of entries [i, n, vector], where i
+    # is the smallest index with ``ax0(i).hash() == h``, n is the
+    # number of indices i1 with ``ax0(i1) == ax0(i)``, and vector is
+    # ``ax0(i)`` or None if not stored. The list has more than
+    # one entry only in case of a collision of hash values.
+    table = {}
+    n_vectors = 0  # number of different vectors ``ax0(i)`` found
+    for i in range(1 << 12):
+        ax = ax0(i)
+        entries = table.setdefault(ax.hash(), [])
+        for entry in entries:
+            if vector(entry) == ax:
+                entry[1] += 1
+                break
+        else:
+            n_vectors += 1
+            entries.append([i, 1, ax])
+            if n_vectors == MAX_STORED_VECTORS + 1:
+                for bucket in table.values():
+                    for entry in bucket:
+                        entry[2] = None
+            elif n_vectors > MAX_STORED_VECTORS:
+                entries[-1][2] = None
     n = 0
-    for h, (a0, a1) in hashes.items():
-        #print(len(a0), len(a1))
-        for v0 in a0:
-            for v1 in a1: 
-                if v0 == v1:
-                    n += 1
-    #print(".", end="", flush=True)
+    for i in range(0, 1 << 25, 1 << 12):
+        ax = v15 * MM(XLeech2(i))
+        for entry in table.get(ax.hash(), []):
+            if vector(entry) == ax:
+                n += entry[1]
+                break
     return n
         
 
@@ -50,9 +77,7 @@ def centralize_axis_Qx0(axis):
 for orbit, ax in AXES.items():
     #print(orbit, ax.__dict__.keys())
     n = centralize_axis_Qx0(ax)
-    # print(orbit)
-    if n is not None:
-        print("%-3s: %6d" % (orbit, n))
+    print("%-3s: %8d" % (orbit, n))
 
    
  
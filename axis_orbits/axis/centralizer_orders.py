@@ -2,7 +2,6 @@ import sys
 import os
 from collections import defaultdict, OrderedDict
 import numpy as np
-from multiprocessing import Pool
 import shelve
 
 from mmgroup import MM0, XLeech2, mat24, MM, Xsp2_Co1
@@ -13,6 +12,7 @@ from mat24_orbits import load_orbits
 
 sys.path.append(os.path.join("..", "utilities"))
 from utilities import order_Nx0, compute_order
+from scheduler import run_tasks
 sys.path.pop()
 
 
@@ -24,24 +24,26 @@ G_X0_SIZE = 2**25 * CO_1_SIZE
 
         
 
+def centralizer_order(axis_type):
+    """Compute the order of the centralizer of an axis
+
+    The worker processes computing these orders map the orbits of
+    the centralizers on the Leech lattice mod 2 into memory, so
+    that these orbits need not be sent to the worker processes.
+    """
+    return compute_order(load_orbits()[axis_type])
+
+
 def centralizer_orders(recompute = True, with_pool = True, verbose = 0):
     with shelve.open(SHELVE_NAME) as db:
         #print(list(db.keys()))
         orbit_sizes = db["ORBIT_SIZES"]
 
-    c =  load_orbits() 
-    axis_types = list(c.keys()) 
-    axis_centralizers = list(c.values())
-    
-    del c
+    axis_types = list(load_orbits().keys()) 
     d = {}
     if recompute:
-        if with_pool: 
-            with Pool() as pool:
-                orders = pool.map(compute_order, axis_centralizers)
-            pool.join()
-        else:
-            orders = [compute_order(x) for x in axis_centralizers]
+        orders = run_tasks(centralizer_order,
+            [(name,) for name in axis_types], mp = with_pool)
     else:
         with shelve.open(SHELVE_NAME) as db:
             d = db["ORBIT_CENTRALIZERS"]
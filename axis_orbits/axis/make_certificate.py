@@ -4,7 +4,6 @@ import time
 from collections import defaultdict, OrderedDict
 from random import randint, sample
 import numpy as np
-from multiprocessing import Pool
 import shelve
 
 
@@ -17,33 +16,93 @@ from mat24_orbits import SHELVE_NAME
 from mat24_orbits import load_orbits, load_samples
 from mat24_orbits import _map_generator
 
+sys.path.append(os.path.join("..", "utilities"))
+from scheduler import run_tasks
+from axis_batch import classify_axes
+sys.path.pop()
 
 
 
+
+# Minimum number of generators of a centralizer tried in function
+# ``find_generators``, and number of random sets of generators of a
+# given size tried for a centralizer before trying larger sets
+MIN_GENERATORS = 2
+N_TRIES = 5
+
+
+def check_generators(orbits, indices):
+    """Check if some generators of a centralizer yield all orbits
+
+    Let ``orbits`` be the orbits of the centralizer G of an axis,
+    given as an instance of class ``Orbit_Lin2``. Let H be the
+    subgroup of G generated by the generators
+    ``orbits.generators()[i]`` for ``i`` in ``indices``. The
+    function returns the orbits of H as an instance of class
+    ``Orbit_Lin2`` if the orbits of G recorded in ``orbits`` are
+    also orbits of H. Otherwise it returns None.
+
+    Since the orbits of H refine the orbits of G, the function
+    may return None as soon as the size of one of these orbits
+    under the action of H differs from the size of that orbit.
+    """
+    generators = orbits.generators()
+    sub_orbits = Orbit_Lin2(_map_generator,
+        [generators[i] for i in indices])
+    for v, size in zip(*orbits.representatives()):
+        if sub_orbits.orbit_size(v) != size:
+            return None
+    return sub_orbits
+
+
+def find_generators(orbits):
+    """Find a small set of generators of the centralizer of an axis
+
+    Let ``orbits`` be the orbits of the centralizer of an axis,
+    given as an instance of class ``Orbit_Lin2``. The function
+    returns the orbits of a subgroup of the centralizer with the
+    same orbits, as returned by function ``check_generators``. That
+    subgroup is generated by some of the generators of ``orbits``.
+
+    First we try random sets of MIN_GENERATORS generators; after
+    N_TRIES failures we try sets of MIN_GENERATORS + 1 generators,
+    etc. Then we remove redundant generators greedily from the set
+    found, down to MIN_GENERATORS generators. If removing a generator
+    from a set fails then removing it from a subset of that set also
+    fails. So each generator has to be tried only once.
+    """
+    n_gen = len(orbits.generators())
+    indices, sub_orbits = list(range(n_gen)), None
+    size, tries = MIN_GENERATORS, 0
+    while size < n_gen and sub_orbits is None:
+        new_indices = sorted(sample(range(n_gen), size))
+        sub_orbits = check_generators(orbits, new_indices)
+        if sub_orbits is not None:
+            indices = new_indices
+        tries += 1
+        if tries >= N_TRIES:
+            size, tries = size + 1, 0
+    for i in list(indices):
+        if len(indices) <= MIN_GENERATORS:
+            break
+        new_indices = [j for j in indices if j != i]
+        new_orbits = check_generators(orbits, new_indices)
+        if new_orbits is not None:
+            indices, sub_orbits = new_indices, new_orbits
+    if sub_orbits is None:
+        sub_orbits = Orbit_Lin2(_map_generator, orbits.generators())
+    return sub_orbits
+
+
 def make_axis_orbit(axis, orbits):
     assert isinstance(axis, Axis)
     assert isinstance(orbits, Orbit_Lin2)
-    generators = orbits.generators()
-    sizes = sorted(list(orbits.representatives()[1]))
-    #print(sizes)
-    n_generators = 2
-    for i in range(20):
-         new_generators = sample(generators, 
-                             min(n_generators, len(generators)))
-         new_orbits = Orbit_Lin2(_map_generator, new_generators)
-         new_reps, new_sizes = new_orbits.representatives()
-         new_data = [(v, n) for v, n in zip(new_reps, new_sizes)
-               if XLeech2(v).type == 4]
-         new_sizes = sorted([x[1] for x in new_data])
-         if sorted(list(new_sizes)) ==  sizes:
-              new_reps = [x[0] for x in new_data]
-              new_orbits.compress(new_reps)
-              return new_orbits, new_reps
-         if i == 4:
-             n_generators += 1
-  
-    err = "No small set of generators for centralizer of axis found"
-    raise ValueError(err)   
+    new_orbits = find_generators(orbits)
+    new_reps, new_sizes = new_orbits.representatives()
+    new_data = [(v, n) for v, n in zip(new_reps, new_sizes)
+          if XLeech2(v).type == 4]
+    new_reps = [x[0] for x in new_data]
+    return new_orbits, new_reps
 
      
 
@@ -65,9 +124,21 @@ def mmstr(g):
 T1 = MM0('t', 1); T2 = MM0('t', 2) 
 
 
-def make_certificate_axis(name, axis, axis_orbit):
+def make_certificate_axis(name):
+    """Compute the part of the certificate dealing with an axis
+
+    The function returns a pair ``(cert, reps)``. Here ``cert`` is
+    the list of the lines of the certificate describing the axis
+    ``AXES[name]`` and its centralizer. ``reps`` is the list of the
+    pairs ``(v, orbit_size)``, where ``v`` is a representative of a
+    relevant orbit of the centralizer on the Leech lattice mod 2.
+    The lines of the certificate describing these orbits are
+    computed by function ``compute_certificate``.
+    """
     cert = []
     cent_strings = set()
+    axis = AXES[name]
+    axis_orbit = load_orbits()[name]
     orbits, reps = make_axis_orbit(axis, axis_orbit)
     gs = mmstr(axis.g)
     cert.append(f"axis: {name} {gs}")
@@ -79,33 +150,32 @@ def make_certificate_axis(name, axis, axis_orbit):
          gs = mmstr(g)
          if gs not in cent_strings:      
              cert.append(f"cent: 2 {gs}")
-    for v in reps:
-         g = map_leech2_vector(v) 
-         gs = mmstr(g)
-         orbit_size = orbits.orbit_size(v)
-         cert.append(f"orb:  {orbit_size}  {gs}")
-         ax = axis * g
-         for exp, t in zip([1,2], [T1, T2]):
-             ax_t = ax * t
-             ax_t_type = ax_t.axis_type()
-             h = ax_t.reduce_G_x0()
-             hs = mmstr(h)
-             cert.append(f"tau{exp}: {ax_t_type}  {hs}")
-    return "\n".join(cert) + "\nend:\n"
+    return cert, [(v, orbits.orbit_size(v)) for v in reps]
 
 
 
 def compute_certificate():
     configure_axis_group() 
     all_orbits = load_orbits()
-    pool_data = []
-    for name, axis in AXES.items():
-        orbit = all_orbits[name]
-        pool_data.append((name, axis, orbit))
-
-    with Pool() as pool:
-       cert_list = pool.starmap(make_certificate_axis, pool_data)
-    pool.join()
+    tasks = [(name,) for name in AXES]
+    costs = [len(all_orbits[name].representatives()[0]) for name in AXES]
+    results = run_tasks(make_certificate_axis, tasks, costs)
+    # The images of the axes under the triality elements are reduced
+    # in a single batch of (smaller) tasks
+    keys = [(name, map_leech2_vector(v) * t)
+        for name, (_, reps) in zip(AXES, results)
+        for v, _ in reps for t in (T1, T2)]
+    classes = iter(classify_axes(keys, Axis, reduce = True))
+    cert_list = []
+    for cert, reps in results:
+        for v, orbit_size in reps:
+            gs = mmstr(map_leech2_vector(v))
+            cert.append(f"orb:  {orbit_size}  {gs}")
+            for exp in (1, 2):
+                (ax_t_type,), h = next(classes)
+                hs = mmstr(h)
+                cert.append(f"tau{exp}: {ax_t_type}  {hs}")
+        cert_list.append("\n".join(cert) + "\nend:\n")
     cert = "".join(cert_list)
     return cert
 
@@ -1,15 +1,22 @@
+import sys
 import os
 import time
 import shutil
 import numpy as np
 from argparse import ArgumentParser
 import shelve
-from multiprocessing import Pool
 
 from mmgroup import MM0, XLeech2, leech2_orbits_raw, mat24, Xsp2_Co1
 from mmgroup.axes import  Axis, set_axis_group
 from mmgroup.general import Orbit_Lin2
 
+sys.path.append(os.path.join("..", "utilities"))
+from array_store import save_arrays, load_arrays
+from scheduler import run_tasks
+from trace_events import span
+from stages import Stage, run_stages
+sys.path.pop()
+
 try:
     import mmgroup.mm_reduce
     from mmgroup import MM
@@ -32,6 +39,16 @@ orbits = [
 SHELVE_PATH = os.path.join(os.path.split(__file__)[0], "shelve")
 SHELVE_NAME = os.path.join(SHELVE_PATH,"mat24_orbit_tables")
 
+# Stage computing the orbits of the centralizers of the axes on the
+# Leech lattice mod 2, see file utilities/stages.py. This is the
+# first stage of the computation of the tables in the shelve.
+ORBITS_STAGE = Stage("orbits", ("mat24_orbits", "compute_orbits"),
+    ["Lin2Orbits", "Lin2Samples"], [], [],
+    {"n_generators": 10, "store": True})
+# Directory containing the arrays stored in the instances of class
+# Orbit_Lin2 computed by function ``compute_orbits``
+LIN2_ORBITS_PATH = os.path.join(SHELVE_PATH, "Lin2Orbits")
+
 
 MP = True
 
@@ -84,36 +101,23 @@ class of involution i: %s
 
 
 
-def make_generators_orbit(orbit, n_generators = 10, verbose = 0):
-    if verbose:
-        for i in range(3):
-            AXES[orbit].display_sym(i, text="t**%d" % i)
-        print(orbit)
-    gen = []
-    for i in range(n_generators):
-        gen.append(find_axis_centralizer(orbit, verbose))
-    if None in gen:
-        raise ValueError("Could not find generator for orbit")
-    return gen
-
 def make_generators(n_generators = 10, verbose = 0):
     #initialize_all()
     if verbose:
         print("Orbits analysed:\n%s" % orbits)
-    d = {}
-    if MP and not verbose:
-        args = []
-        for orbit in orbits:
-            args.append((orbit, n_generators, verbose))
-        with Pool() as pool:
-            res = pool.starmap(make_generators_orbit, args)
-        pool.join()
-        for i, orbit in enumerate(orbits):
-            d[orbit] = res[i]
-    else:
         for orbit in orbits:
-            gen = make_generators_orbit(orbit, n_generators, verbose)
-            d[orbit] = gen
+            for i in range(3):
+                AXES[orbit].display_sym(i, text="t**%d" % i)
+            print(orbit)
+    # One task for each generator of a centralizer
+    tasks = [(orbit, verbose) for orbit in orbits
+        for i in range(n_generators)]
+    gen = run_tasks(find_axis_centralizer, tasks, mp = MP and not verbose)
+    d = {}
+    for k, orbit in enumerate(orbits):
+        d[orbit] = gen[k * n_generators : (k + 1) * n_generators]
+        if None in d[orbit]:
+            raise ValueError("Could not find generator for orbit")
     if verbose:
         print("Generators of centralizers found for orbits:")
         print(list(d.keys()))
@@ -177,15 +181,13 @@ def store_pickle_functions():
 def compute_orbits(n_generators = 10, store = True, verbose = 0):
     print("Computing orbits...")
     store_pickle_functions() 
-    d = make_generators(n_generators, verbose)
+    with span("generator search", "step"):
+        d = make_generators(n_generators, verbose)
     list_orbit_names, list_generators = list(d.keys()), list(d.values()) 
-    if MP:
-        with Pool() as pool:
-            #list_lin2_orbits = pool.map(get_orbits, list(list_generators))
-            orbits_samples = pool.map(get_orbits, list(list_generators))
-        pool.join()
-    else:
-        orbits_samples = [get_orbits(y) for y in list_generators]
+    with span("Orbit_Lin2 construction", "step"):
+        orbits_samples = run_tasks(get_orbits,
+            [(y,) for y in list_generators], mp = MP,
+            labels = list_orbit_names)
     #d = dict(zip(list_orbit_names, list_lin2_orbits))
     list_orbits = [orbits for orbits, _ in orbits_samples]
     list_samples = [samples for _, samples in orbits_samples]
@@ -196,8 +198,9 @@ def compute_orbits(n_generators = 10, store = True, verbose = 0):
          for name, obj in d.items():
              data, _ = obj.pickle(*_PIC)
              d_pic[name] = data
+         index = save_arrays(LIN2_ORBITS_PATH, d_pic)
          with shelve.open(SHELVE_NAME) as db:
-             db["Lin2Orbits"] = d_pic
+             db["Lin2Orbits"] = index
              db["Lin2Samples"] = d_samples
          del d_pic
          print("Path of shelve:\n" + SHELVE_NAME)
@@ -210,8 +213,7 @@ def load_orbits():
     if _LOADED_ORBITS is not None:
         return _LOADED_ORBITS
     store_pickle_functions()
-    with shelve.open(SHELVE_NAME) as db:
-        d0 = db["Lin2Orbits"]
+    d0 = load_arrays(LIN2_ORBITS_PATH)
     _LOADED_ORBITS = {}
     for name, pickled in d0.items():
         _LOADED_ORBITS[name] = Orbit_Lin2(pickled, PICKLE_FUNTIONS)
@@ -306,9 +308,9 @@ def check_orbits(d, verbose = 0):
 
 if __name__ == "__main__":
     options = parse_args()
-    recompute = check_recompute(options.recompute)
-    if recompute:
-        d = compute_orbits(n_generators = 10, store = True) 
+    check_recompute(options.recompute)
+    sys.path.append(os.path.join("..", "utilities"))
+    run_stages(SHELVE_NAME, [ORBITS_STAGE])
     d = load_orbits()   
     check_orbits(d)
     display_orbits(d, not options.no_mat24, options.sizes)
@@ -7,11 +7,22 @@ Entries are documented in the order in that they are created.
 
 Entry name: Lin2Orbits
 Created by: mat24_orbits.py
-type:       dict: str -> list of pickled instances of class Orbit_Lin2
-
-Function ``load_orbits`` in module ``mat24_orbits`` unpickles these
-instances and returns a dictionary 
-``str --> instance of class Orbit_Lin2``
+type:       dict: str -> list of pairs (str, str)
+
+The pickled instances of class Orbit_Lin2 computed by module 
+``mat24_orbits`` are too large for the shelve. The arrays contained
+in these pickled instances are stored as ``.npy`` files in the 
+subdirectory 'Lin2Orbits' of the directory containing the shelve, 
+see module ``array_store`` in subdirectory 'utilities'. This entry
+contains the index of these files. It maps the name of an orbit to
+the list of pairs ``(filename, digest)`` for the arrays stored for
+that orbit. Here ``digest`` is the SHA-256 hash of the array. The
+index is also stored in the file 'index.json' in subdirectory
+'Lin2Orbits'.
+
+Function ``load_orbits`` in module ``mat24_orbits`` maps these
+arrays into memory, unpickles the instances of class Orbit_Lin2,
+and returns a dictionary ``str --> instance of class Orbit_Lin2``
 
 Let ``orbit_name`` be the name of a G_x0 orbit of 2A axes. A standard
 representative ``axis`` of that orbit is given by 
@@ -122,14 +133,17 @@ array ``SUBORBIT_SIZES`` contains the size of the N_x0 orbit ``i``.
 
 Entry name: SUBORBIT_CENTRALIZERS
 Created by: watermark_suborbits.py
-type:       list of list of strings
+type:       list of numpy arrays of type np.uint32
 
 N_x0 orbits of 2A axes are numbered with integers. For each of these 
 orbits we compute a representative as in the description of entry
 "SUBORBIT_REPRESENTATIVES" of thei shelve. Entry ``i`` of array
-``SUBORBIT_CENTRALIZERS`` is a list of strings corresponding
-to random elements of the centralizer of the representative of the
-the i-th N_x0 orbit. The (random) generators of a centralizer are
+``SUBORBIT_CENTRALIZERS`` is an array encoding a list of 
+random elements of the centralizer of the representative of the
+the i-th N_x0 orbit. Each row of that array encodes an element of
+N_x0 as computed by function ``Nx0_to_array`` in file
+utilities/utilities.py; function ``array_to_Nx0`` in that file
+converts that array to a list of instances of class ``Xsp2_Co1``. The (random) generators of a centralizer are
 modified so that most the first of these generators will be odd,
 i.e. in N_x0 \ N_xyz.
 
@@ -165,5 +179,21 @@ e_3:  :math:`x_{d}, \;  d \in \mathcal{C}
 e_4:  :math:`y_{d}, \;  d \in \mathcal{C}  
 
 For more details, see function ``order_Nx0`` in module ``utilities``.
+
+
+
+Entry name: STAGE_RECORDS
+Created by: utilities/stages.py
+type:       dict: str -> pair(str, dict: str -> str)
+
+The entries of the shelve are computed in stages, as listed in 
+``STAGES`` in file ``axis.py``. This dictionary maps the name of a
+stage to a pair ``(key, outputs)``. Here ``key`` is a hash value
+computed from the source files and the parameters of the stage,
+from the version of the mmgroup package, and from the digests of
+the entries of the shelve read by the stage. Dictionary ``outputs``
+maps the names of the entries of the shelve written by the stage
+to their digests. A stage is recomputed only if its key changes.
+For details see module ``stages`` in subdirectory 'utilities'.
 """
 
@@ -5,7 +5,6 @@ from collections import defaultdict, OrderedDict
 from random import randint, sample
 import numpy as np
 from argparse import ArgumentParser
-from multiprocessing import Pool
 import shelve
 
 
@@ -13,10 +12,15 @@ import shelve
 from mmgroup import MM0, XLeech2, leech2_orbits_raw, mat24, MM
 from mmgroup.general import Orbit_Lin2
 
-from mat24_orbits import AXES, configure_axis_group
+from mat24_orbits import AXES, Axis, configure_axis_group
 from mat24_orbits import SHELVE_NAME 
 from mat24_orbits import load_orbits, load_samples
 
+sys.path.append(os.path.join("..", "utilities"))
+from scheduler import run_tasks
+from axis_batch import classify_axes, axis_type_name
+sys.path.pop()
+
 configure_axis_group() 
 
 
@@ -34,15 +38,12 @@ def map_leech2_vector(v):
 
 
 def triality_orbits(axis, g = MM0()):
-    def name(o):
-       assert 0x11 <= o < 0xC6
-       return str(o >> 4) + "?ABCDEFGH"[o & 0xf]
     mode = 0x16
     ax_d, g_d = axis.v15.data, g.mmdata 
     axtypes = mm_reduce_op_2A_axis_type(ax_d, g_d, len(g_d), mode)
     tlist = [(axtypes >> i) & 255  for i in (8, 16)]
     tlist.sort()
-    return name(tlist[0]), name(tlist[1])
+    return axis_type_name(tlist[0]), axis_type_name(tlist[1])
 
 T1 = MM0('t', 1); T2 = MM0('t', 2) 
 
@@ -53,16 +54,23 @@ def py_triality_orbits(axis, g = MM0()):
     lst.sort()
     return tuple(lst)
 
+
 try:
     from mmgroup.mm_reduce import mm_reduce_op_2A_axis_type
 except  (ImportError, ModuleNotFoundError):
     triality_orbits = py_triality_orbits
 
-def is_good_axis(axis):
-    orbit = axis.axis_type()
-    g = axis.reduce_G_x0()
-    ref_axis = AXES[orbit]
-    return (axis * g).v15 == ref_axis.v15
+def good_axes(keys):
+    """Check the reduction of a list of axes
+
+    Each entry ``(orbit_name, g)`` of the list ``keys`` denotes the
+    axis ``AXES[orbit_name] * g``. The function returns True if
+    method ``reduce_G_x0`` maps all these axes to the representatives
+    of their orbits.
+    """
+    classes = classify_axes(keys, Axis, reduce = True, mp = False)
+    return all((AXES[name] * g * h).v15 == AXES[types[0]].v15
+        for (name, g), (types, h) in zip(keys, classes))
 
 
 
@@ -70,32 +78,30 @@ def is_good_axis(axis):
 N = 8
 N_VERIFY = 1
 
-def process_orbit(orbit_name, axis, orbits, samples, verbose = False):
-    d = defaultdict(int)
-    if verbose:
-        print("orbit", orbit_name)
-    reps, lengths = orbits.representatives()
-    for i, v in enumerate(reps):
-        v_list = samples[i]
-        assert v_list[0] == v
-        g = map_leech2_vector(v)
-        ref_img = triality_orbits(axis, g)
-        for j, v1 in enumerate(v_list[1:]):
-            if v1 == 0:
-                break
-            g = map_leech2_vector(v1)
-            img = triality_orbits(axis, g)
-            if verbose:
-                print("%-3s %2d: %s" % (orbit_name, i+1, img))
-            assert img == ref_img, (img, ref_img)
-            if j >= N_VERIFY:
-                continue
-            #print("*")
-            for t in T1, T2:
-                assert is_good_axis(axis * g * t)
-        d[(orbit_name, ref_img[0])] += lengths[i]
-        d[(orbit_name, ref_img[1])] += lengths[i]
-    return d
+def process_representative(orbit_name, i, v_list, verbose = False):
+    """Check the triality images of the axes in an N_x0 orbit
+
+    Let ``ax = AXES[orbit_name]``. Vector ``v_list[0]`` is the
+    representative of the ``i``-th orbit of the centralizer of
+    ``ax`` on the Leech lattice mod 2, and the following nonzero
+    entries of ``v_list`` are samples of that orbit.
+
+    The function returns the pair of the names of the orbits of
+    the images of the axis under the triality elements.
+    """
+    n = 1 + np.count_nonzero(v_list[1:])
+    assert not np.any(v_list[n:])
+    keys = [(orbit_name, map_leech2_vector(v)) for v in v_list[:n]]
+    classes = classify_axes(keys, Axis, (1, 2), mp = False)
+    images = [tuple(sorted(types)) for types, _ in classes]
+    ref_img = images[0]
+    for img in images[1:]:
+        if verbose:
+            print("%-3s %2d: %s" % (orbit_name, i+1, img))
+        assert img == ref_img, (img, ref_img)
+    assert good_axes([(name, g * t)
+        for name, g in keys[1 : 1 + N_VERIFY] for t in (T1, T2)])
+    return ref_img
 
 
 MP = True
@@ -105,17 +111,22 @@ def check_monster_axes(verbose = 0):
     samples = load_samples()
     assert isinstance(list(orbits.values())[0], Orbit_Lin2)
     print("Checking 2A axes in Monster")
-    data = [(name, axis, orbits[name], samples[name])
-        for name, axis in AXES.items()]
-    if MP:
-        with Pool() as pool:
-            orders = pool.starmap(process_orbit, data)
-        pool.join()
-    else:
-        orders = [process_orbit(*y) for y in data]
+    # One task for each N_x0 orbit, with cost given by the number
+    # of samples to be checked in that orbit
+    tasks, lengths, costs = [], [], []
+    for name in AXES:
+        reps, orbit_lengths = orbits[name].representatives()
+        for i, v in enumerate(reps):
+            v_list = samples[name][i]
+            assert v_list[0] == v
+            tasks.append((name, i, v_list, verbose))
+            lengths.append(orbit_lengths[i])
+            costs.append(int(np.count_nonzero(v_list)))
+    images = run_tasks(process_representative, tasks, costs, mp = MP)
     d = defaultdict(int)
-    for o in orders:
-        d.update(o)
+    for (name, _, _, _), ref_img, length in zip(tasks, images, lengths):
+        d[(name, ref_img[0])] += length
+        d[(name, ref_img[1])] += length
 
     if verbose:
         for o, n in d.items():
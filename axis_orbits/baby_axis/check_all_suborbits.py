@@ -6,7 +6,6 @@ from random import randint, sample
 import numpy as np
 from argparse import ArgumentParser
 import shelve
-from multiprocessing import Pool
 
 from mmgroup import MM0, XLeech2, GCode, Octad, Xsp2_Co1
 from mmgroup.general import Random_Subgroup
@@ -16,9 +15,12 @@ from mat22_orbits import BabyAxis
 
 
 sys.path.append(os.path.join("..", "utilities"))
-from utilities import order_Nx0, is_Nx0_odd
+from utilities import order_Nx0, is_Nx0_odd, array_to_Nx0
 from utilities import MM_to_GAP
-from utilities_gap import create_input_for_gap, run_gap
+from utilities_gap import create_input_for_gap
+from utilities_gap import run_gap_pool, GAP_TIMEOUT
+from scheduler import run_tasks, default_processes
+from axis_batch import axis_types
 sys.path.pop()
 
 
@@ -38,10 +40,17 @@ GAP_INPUT = os.path.join(GAP_DIR, "Nx0_orbit_structure.g")
 GAP_OUTPUT = os.path.join(GAP_DIR, "Nx0_orbit_structure.txt")
 
 
+# List of representatives of the suborbits, as returned by function
+# ``suborbit_sample_axes`` in module ``watermark_suborbits``. This is
+# computed by function ``sample_axes`` when needed. Function
+# ``load_tables`` resets this list.
+SAMPLE_AXES = None
+
 def load_tables():
     global MAP_SUBORBIT, SUBORBIT_REPRESENTATIVES, SUBORBIT_SIZES
     global ORBITS, GENERATOS
-    global SUBORBIT_CENTRALIZERS
+    global SUBORBIT_CENTRALIZERS, SAMPLE_AXES
+    SAMPLE_AXES = None
     with shelve.open(SHELVE_NAME) as db:
         MAP_SUBORBIT = db["MAP_SUBORBIT"]
         SUBORBIT_REPRESENTATIVES = db["SUBORBIT_REPRESENTATIVES"]
@@ -51,6 +60,22 @@ def load_tables():
 
 
 
+def sample_axes():
+    """Return the list of representatives of the suborbits
+
+    The list is computed only once after loading the tables.
+    """
+    global SAMPLE_AXES
+    if SAMPLE_AXES is None:
+        from watermark_suborbits import suborbit_sample_axes
+        SAMPLE_AXES = suborbit_sample_axes()
+    return SAMPLE_AXES
+
+def init_suborbit_checker():
+    """Initialize a worker process for function ``check_one_suborbit``"""
+    load_tables()
+    sample_axes()
+
 def suborbit_axis(axis):
     from watermark_suborbits import watermark_axis
     wm = watermark_axis(axis)
@@ -59,9 +84,8 @@ def suborbit_axis(axis):
 
 
 def test_hash_axes():
-    from watermark_suborbits import suborbit_sample_axes
     hashes = set()
-    for axis in suborbit_sample_axes():
+    for axis in sample_axes():
         h_list = [axis.profile_Nxyz(t = (0,i))[1] for i in (0,1)]
         for h in h_list:
             assert h not in hashes
@@ -71,23 +95,27 @@ def test_hash_axes():
 
 
 
-def check_one_suborbit(i, ref_axis, entry, v, suborbit_size, centralizer, map):
-    # orbit_name, entry, v = SUBORBIT_REPRESENTATIVES[i] 
-    # ref_axis = BabyAxis.representatives()[orbit_name]
-    # suborbit_size = int(SUBORBIT_SIZES[i])
-    # centralizer = SUBORBIT_CENTRALIZERS[i]
-    # map = MAP_SUBORBIT
-    from watermark_suborbits import suborbit_sample_axes
-    axis = suborbit_sample_axes()[i]
+def check_one_suborbit(i):
+    """Check the suborbit with number ``i``
+
+    Function ``init_suborbit_checker`` must be called before calling
+    this function.
+    """
+    orbit_name, entry, v = SUBORBIT_REPRESENTATIVES[i]
+    ref_axis = AXES[orbit_name]
+    suborbit_size = int(SUBORBIT_SIZES[i])
+    centralizer = array_to_Nx0(SUBORBIT_CENTRALIZERS[i])
+    map = MAP_SUBORBIT
+    axis = sample_axes()[i]
     assert axis == ref_axis *  Xsp2_Co1('c', v) ** -1
     e, f, s = order_Nx0(centralizer)
     order = f << (sum(e) + s)
     assert suborbit_size * order == N_X0_SIZE
     assert s == is_Nx0_odd(centralizer[0])
-    assert axis * Xsp2_Co1(centralizer[0]) == axis
+    assert axis * centralizer[0] == axis
     for c in sample(centralizer[1:], 5):
         assert is_Nx0_odd(c) == 0
-        assert axis * Xsp2_Co1(c) == axis
+        assert axis * c == axis
     for j in range(3):
         axis1 = axis * Xsp2_Co1('r', 'N_x0 & B')
         wm = (axis1.profile_Nxyz((0, 0), 1)[1],
@@ -98,22 +126,9 @@ def check_one_suborbit(i, ref_axis, entry, v, suborbit_size, centralizer, map):
 
 
 def check_all_suborbits():
-    list_cases = []
-    map = MAP_SUBORBIT
-    axis_representatives = BabyAxis.representatives()
-    for i, (orbit_name, entry, v) in enumerate(SUBORBIT_REPRESENTATIVES):
-        ref_axis = axis_representatives[orbit_name]
-        suborbit_size = int(SUBORBIT_SIZES[i])
-        centralizer = SUBORBIT_CENTRALIZERS[i]
-        list_cases.append((
-            i, ref_axis, entry, v, suborbit_size, centralizer, map))
-    if MP:
-        nprocesses = max(1, min(16, os.cpu_count() - 2))
-        with Pool(processes = nprocesses) as pool:
-            c = pool.starmap(check_one_suborbit, list_cases, chunksize = 8)
-        pool.join()
-    else:
-        c = [check_one_suborbit(*args) for args in list_cases]
+    cases = range(len(SUBORBIT_REPRESENTATIVES))
+    c = run_tasks(check_one_suborbit, [(i,) for i in cases], mp = MP,
+        initializer = init_suborbit_checker)
     with shelve.open(SHELVE_NAME) as db:
         db["SUBORBIT_SIZES_2"] = c
 
@@ -121,16 +136,17 @@ def check_all_suborbits():
 
 
 def display_suborbits():
-    from watermark_suborbits import suborbit_sample_axes
-    sample_axes = suborbit_sample_axes()
+    from watermark_suborbits import suborbit_sample_keys
+    axes = sample_axes()
+    orbits = axis_types(suborbit_sample_keys(), BabyAxis)
     hd_fmt = "%5s: %4s   %10s  %20s  %4s"
     print(hd_fmt % ("Orbit", "G_x0", "Images", "Orbit size", "#odd"))
     fmt = "%5d: %4s   {%3d, %3d}  %20d  %4s"
     with shelve.open(SHELVE_NAME) as db:
         suborbit_sizes2 = db["SUBORBIT_SIZES_2"]
     for i, _ in enumerate(SUBORBIT_REPRESENTATIVES):
-        axis = sample_axes[i]
-        orbit = axis.axis_type()
+        axis = axes[i]
+        orbit = orbits[i]
         assert suborbit_axis(axis) == i
         images = [suborbit_axis(axis * MM0('t', e)) for e in (1,2)]
         images.sort()
@@ -172,24 +188,28 @@ def print_input_for_gap():
     f_in = GAP_INPUT
     f_out = GAP_OUTPUT
     with shelve.open(SHELVE_NAME) as db:
-        centralizers = db["SUBORBIT_CENTRALIZERS"]
+        centralizers = [array_to_Nx0(c)
+            for c in db["SUBORBIT_CENTRALIZERS"]]
         orders = [x[1] for x in db["SUBORBIT_SIZES_2"]] 
     create_input_for_gap(centralizers, orders, f_in)
 
-def call_gap():
-    run_gap(GAP_INPUT, GAP_OUTPUT)
-
+def call_gap(timeout = GAP_TIMEOUT):
+    """Compute the structure of the centralizers of the suborbits in GAP
 
-def ___display_output_for_gap():
-    """Deprecated"""
+    The centralizers are distributed to several GAP processes. The
+    computation for each centralizer must finish within ``timeout``
+    seconds. The function returns True if the structures of all
+    centralizers have been written to file GAP_OUTPUT. Otherwise
+    a subsequent call resumes the computation, and an old file
+    GAP_OUTPUT is left unchanged.
+    """
     with shelve.open(SHELVE_NAME) as db:
-        centralizers = db["SUBORBIT_CENTRALIZERS"]
-    for i, c in enumerate(centralizers):
-        g = MM_to_GAP(c)
-        print(f"""G{i} = Group(
-{g});
-Print(G{i} = StructureDescription(G{i}, "\\n");
-""")
+        centralizers = [array_to_Nx0(c)
+            for c in db["SUBORBIT_CENTRALIZERS"]]
+        orders = [x[1] for x in db["SUBORBIT_SIZES_2"]] 
+    return run_gap_pool(centralizers, orders, GAP_OUTPUT,
+        default_processes(), timeout, input_file = GAP_INPUT)
+
 
 if __name__ == "__main__":
     opt = parse_args()
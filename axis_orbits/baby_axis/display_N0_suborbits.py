@@ -11,11 +11,13 @@ import numpy as np
 from argparse import ArgumentParser
 import shelve
 
-from mat22_orbits import SHELVE_NAME, load_orbits 
+from mat22_orbits import SHELVE_NAME, load_orbits, BabyAxis
 from watermark_suborbits import suborbit_sample_axes
+from watermark_suborbits import suborbit_sample_keys
 
 sys.path.append(os.path.join("..", "utilities"))
 from utilities_gap import parse_gap_output
+from axis_batch import classify_axes, axis_types
 sys.path.pop()
 
 
@@ -79,10 +81,16 @@ def key_Gx0_orbit(orbit):
 
 
 
-def Nx0_orbit_str(axis):
+def Nx0_orbit_str(axis, types):
+    """Describe the G_x0 orbits of the images of an axis under triality
+
+    Here ``types`` is the triple of the G_x0 orbits of the images
+    ``axis * t**e``, ``e = 0, 1, 2``, as computed by function
+    ``classify_axes``.
+    """
     d = defaultdict(int)
     for e in range(3):
-        G_x0_orbit = axis.axis_type(e)
+        G_x0_orbit = types[e]
         key = key_Gx0_orbit(G_x0_orbit)
         d[(key, G_x0_orbit, get_Nx0_orbit(axis, e))] += 1
     o_list_keyed = list(sorted(d.items()))
@@ -102,6 +110,7 @@ def collect_Nx0_suborbits(verbose = 0):
     sub_structure = parse_gap_output(GAP_OUTPUT)
     suborbits = [None] * len(SUBORBIT_REPRESENTATIVES)
     sample_axes = suborbit_sample_axes()
+    types = classify_axes(suborbit_sample_keys(), BabyAxis, (0, 1, 2))
     for i, _ in enumerate(SUBORBIT_REPRESENTATIVES):
         suborbits[i] = s = Nx0_Suborbit()
         gap_output = sub_structure[i]
@@ -111,7 +120,7 @@ def collect_Nx0_suborbits(verbose = 0):
         e, s.g_order, s.s_order = SUBORBIT_SIZES_2[i]
         s.e = [e[0] + e[1], e[2], e[3] + e[4]]
         axis = sample_axes[i]
-        s.images, s.Gx0_orbits, s.Gx0_key = Nx0_orbit_str(axis)
+        s.images, s.Gx0_orbits, s.Gx0_key = Nx0_orbit_str(axis, types[i][0])
         assert s.g_order == gap_order
         assert i in s.images
         if verbose:
@@ -219,9 +228,8 @@ N_x0  N_0      e        |G|      ind  2^e   G        orbit""")
         assert rem == 0, (a, b, index, rem)
         assert 1 <= index <= 2, (a, b, index, rem)
         return index
-    from mmgroup import Xsp2_Co1
-    from utilities import order_Nx0
-    sample_axes = suborbit_sample_axes()
+    from utilities import order_Nx0, array_to_Nx0
+    Gx0_orbits = axis_types(suborbit_sample_keys(), BabyAxis)
     map_N0 = {}
     for j, orb in enumerate(N0_orbits):
         for  Nx0_orbit in orb.Nx0_orbits:
@@ -234,15 +242,14 @@ N_x0  N_0      e        |G|      ind  2^e   G        orbit""")
         assert g == orb.g_order
         Nxyz_e = sum(orb.e)
         Nxyz_g_order = orb.g_order
-        c = [Xsp2_Co1(g) for g in SUBORBIT_CENTRALIZERS[i]]
+        c = array_to_Nx0(SUBORBIT_CENTRALIZERS[i])
         e, Nx0_g_order = order_Nx0(c , e_odd = False)
         Nx0_e = sum(e)
         index_Nxyz_e = 1 << (Nx0_e - Nxyz_e)
         assert index_Nxyz_e in [1, 2]
         index_Nxyz_g = index2(Nx0_g_order, Nxyz_g_order) 
         assert index_Nxyz_g * index_Nxyz_e == index
-        axis = sample_axes[i]
-        Gx0_orbit = axis.axis_type()
+        Gx0_orbit = Gx0_orbits[i]
         print(FMT % (i, j, Nx0_e, Nx0_g_order,
              index, index_Nxyz_e, index_Nxyz_g, Gx0_orbit ))
 
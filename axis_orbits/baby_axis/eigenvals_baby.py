@@ -1,4 +1,5 @@
 import sys
+import os
 import shelve
 import numpy as np
 from collections import defaultdict, OrderedDict
@@ -16,6 +17,10 @@ from mat22_orbits import AXES
 from mat22_orbits import load_orbits
 ORBITS = list(AXES.keys())
 
+sys.path.append(os.path.join("..", "utilities"))
+from axis_batch import axis_types
+sys.path.pop()
+
 
 
 DICT_NAME = "mat22_suborbits"
@@ -121,9 +126,10 @@ def load_num_N_xyz_suborbits():
     with shelve.open(SHELVE_NAME) as db:
         representatives = db["SUBORBIT_REPRESENTATIVES"]
         sizes_2 = db["SUBORBIT_SIZES_2"]
-    for i, (orbit_name, entry, v) in enumerate(representatives):
-        axis = AXES[orbit_name] * MM0('c', v) ** -1
-        G_x0_orbit = axis.axis_type()
+    keys = [(orbit_name, MM0('c', v) ** -1)
+        for orbit_name, entry, v in representatives]
+    G_x0_orbits = axis_types(keys, BabyAxis)
+    for i, G_x0_orbit in enumerate(G_x0_orbits):
         n = 2 >> sizes_2[i][2]
         d[G_x0_orbit] += n
     return d
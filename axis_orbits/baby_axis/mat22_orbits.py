@@ -1,10 +1,10 @@
+import sys
 import os
 import time
 import shutil
 import numpy as np
 from argparse import ArgumentParser
 import shelve
-from multiprocessing import Pool
 
 from mmgroup import MM0, XLeech2, leech2_orbits_raw, mat24
 from mmgroup.axes import  BabyAxis, set_axis_group
@@ -13,6 +13,13 @@ from mmgroup import MM0, XLeech2, leech2_orbits_raw, mat24, Xsp2_Co1
 from mmgroup.axes import  Axis, set_axis_group
 from mmgroup.general import Orbit_Lin2
 
+sys.path.append(os.path.join("..", "utilities"))
+from array_store import save_arrays, load_arrays
+from scheduler import run_tasks
+from trace_events import span
+from stages import Stage, run_stages
+sys.path.pop()
+
 try:
     import mmgroup.mm_reduce
     from mmgroup import MM
@@ -37,6 +44,16 @@ orbits = list(AXES.keys())
 SHELVE_PATH = os.path.join(os.path.split(__file__)[0], "shelve")
 SHELVE_NAME = os.path.join(SHELVE_PATH,"mat22_orbit_tables")
 
+# Stage computing the orbits of the centralizers of the axes on the
+# Leech lattice mod 2, see file utilities/stages.py. This is the
+# first stage of the computation of the tables in the shelve.
+ORBITS_STAGE = Stage("orbits", ("mat22_orbits", "compute_orbits"),
+    ["Lin2Orbits", "Lin2Samples"], [], [],
+    {"n_generators": 10, "store": True})
+# Directory containing the arrays stored in the instances of class
+# Orbit_Lin2 computed by function ``compute_orbits``
+LIN2_ORBITS_PATH = os.path.join(SHELVE_PATH, "Lin2Orbits")
+
 ##################################################################
 
 
@@ -90,17 +107,19 @@ def make_generators(n_generators = 20, verbose = 0):
     #initialize_all()
     if verbose:
         print("Orbits analysed:\n%s" % orbits)
-    d = {}
-    for orbit in orbits:
-        if verbose:
+        for orbit in orbits:
             for i in range(3):
                  AXES[orbit].display_sym(i, text="t**%d" % i)
             print(orbit)
-        gen = []
-        for i in range(n_generators):
-            gen.append(find_axis_centralizer(orbit, verbose))
-        if not None in gen:
-            d[orbit] = gen
+    # One task for each generator of a centralizer
+    tasks = [(orbit, verbose) for orbit in orbits
+        for i in range(n_generators)]
+    gen = run_tasks(find_axis_centralizer, tasks, mp = MP and not verbose)
+    d = {}
+    for k, orbit in enumerate(orbits):
+        orbit_gen = gen[k * n_generators : (k + 1) * n_generators]
+        if not None in orbit_gen:
+            d[orbit] = orbit_gen
     if verbose:
         print("Generators of centralizers found for orbits:")
         print(list(d.keys()))
@@ -162,14 +181,13 @@ MP = True
 
 def compute_orbits(n_generators = 10, store = True, verbose = 0):
     store_pickle_functions() 
-    d = make_generators(n_generators, verbose)
+    with span("generator search", "step"):
+        d = make_generators(n_generators, verbose)
     list_orbit_names, list_generators = list(d.keys()), list(d.values()) 
-    if MP:
-        with Pool() as pool:
-            orbits_samples = pool.map(get_orbits, list(list_generators))
-        pool.join()
-    else:
-        orbits_samples = [get_orbits(y) for y in list_generators]
+    with span("Orbit_Lin2 construction", "step"):
+        orbits_samples = run_tasks(get_orbits,
+            [(y,) for y in list_generators], mp = MP,
+            labels = list_orbit_names)
     list_orbits = [orbits for orbits, _ in orbits_samples]
     list_samples = [samples for _, samples in orbits_samples]
     d = dict(zip(list_orbit_names, list_orbits))
@@ -179,16 +197,16 @@ def compute_orbits(n_generators = 10, store = True, verbose = 0):
          for name, obj in d.items():
              data, _ = obj.pickle(*_PIC)
              d_pic[name] = data
+         index = save_arrays(LIN2_ORBITS_PATH, d_pic)
          with shelve.open(SHELVE_NAME) as db:
-             db["Lin2Orbits"] = d_pic
+             db["Lin2Orbits"] = index
              db["Lin2Samples"] = d_samples
          del d_pic
     return d    
 
 def load_orbits():
     store_pickle_functions()
-    with shelve.open(SHELVE_NAME) as db:
-        d0 = db["Lin2Orbits"]
+    d0 = load_arrays(LIN2_ORBITS_PATH)
     d = {}
     for name, pickled in d0.items():
         d[name] = Orbit_Lin2(pickled, PICKLE_FUNTIONS)
@@ -270,9 +288,9 @@ def check_orbits(d, verbose = 0):
 
 if __name__ == "__main__":
     options = parse_args()
-    recompute = check_recompute(options.recompute)
-    if recompute:
-        d = compute_orbits(n_generators = 10, store = True) 
+    check_recompute(options.recompute)
+    sys.path.append(os.path.join("..", "utilities"))
+    run_stages(SHELVE_NAME, [ORBITS_STAGE])
     d = load_orbits()   
     check_orbits(d)
     display_orbits(d, not options.no_mat24, options.sizes)
@@ -7,13 +7,13 @@ import numpy as np
 from argparse import ArgumentParser
 import shelve
 
-from mmgroup import MM0, MM, AutPL, Xsp2_Co1, XLeech2
+from mmgroup import MM0, AutPL, Xsp2_Co1, XLeech2
 
 from mat22_orbits import SHELVE_NAME 
 from mat22_orbits import load_orbits, load_samples
 from mat22_orbits import BabyAxis, configure_axis_group 
 sys.path.append(os.path.join("..", "utilities"))
-from utilities import trim_N_x0
+from utilities import trim_N_x0, Nx0_to_array
 sys.path.pop()
 
 OMEGA = XLeech2(0x800000)
@@ -178,8 +178,7 @@ def suborbit_to_representative(verbose = 1):
             assert mod == 0
             SUBORBIT_SIZES[suborbit_no] = size
             centralizer = WATERMARK_DICT[watermark][4] 
-            SUBORBIT_CENTRALIZERS[suborbit_no] = [
-                str(MM(g)) for g in centralizer ]
+            SUBORBIT_CENTRALIZERS[suborbit_no] = Nx0_to_array(centralizer)
     for entry in a:
         assert entry is not None
     SUBORBIT_REPRESENTATIVES = a
@@ -189,14 +188,24 @@ def suborbit_to_representative(verbose = 1):
             print(i, entry) 
 
 
-def suborbit_sample_axes():
+def suborbit_sample_keys():
+    """Return the list of representatives of the suborbits as pairs
+
+    An entry ``(orbit_name, g)`` of the list denotes the representative
+    ``AXES[orbit_name] * g`` of a suborbit, as in function
+    ``classify_axes`` in file utilities/axis_batch.py.
+    """
     with shelve.open(SHELVE_NAME) as db:
         representative_data = db["SUBORBIT_REPRESENTATIVES"]
-    representatives = []
+    keys = []
     for i, (orbit_name, entry, v) in enumerate(representative_data):
         assert v == reps_dict[orbit_name][entry]
-        representatives.append(AXES[orbit_name] * MM0('c', v) ** -1) 
-    return representatives
+        keys.append((orbit_name, MM0('c', v) ** -1)) 
+    return keys
+
+
+def suborbit_sample_axes():
+    return [AXES[orbit_name] * g for orbit_name, g in suborbit_sample_keys()]
 
 
 def final_check():
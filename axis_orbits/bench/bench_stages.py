@@ -0,0 +1,209 @@
+r"""Benchmark the stages of the computations of the tables
+
+The script runs all stages of the computation of the tables in
+subdirectory 'axis' (or 'baby_axis' with option --baby) and measures
+the run time of each stage. It also measures the run time for
+generating and for checking a certificate. The random generators
+are seeded with a fixed seed, see function ``set_seed`` in file
+utilities/scheduler.py; so two runs with the same seed and the same
+version of the mmgroup package perform the same computations.
+
+The script must be called from the main directory, e.g.:
+
+python3 bench/bench_stages.py --baby -o baby.json -b baby_base.json
+
+The run times are written to a file in json format. If a baseline
+file (written by a previous run of the script) is given then the
+run times are compared with the run times in that file. Then
+the script exits with status 1 if a stage is slower by more than
+the tolerance given by option --tolerance.
+
+The stages are run with function ``run_stages`` in file
+utilities/stages.py; so the tables in the shelve are updated as in
+the scripts axis.py or baby_axis.py. The certificates are written
+to this directory, so that the certificates in subdirectory
+'certificates' are not changed.
+"""
+import sys
+import os
+import time
+import json
+import runpy
+import platform
+from argparse import ArgumentParser
+
+
+DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = "bench"
+
+# Default seed for the random generators
+SEED = 1
+
+# Default relative tolerance for the comparison with a baseline
+TOLERANCE = 0.2
+
+# Names of the pseudo stages for generating and checking certificates
+MAKE_CERT = "make_certificate"
+CHECK_CERT = "check_certificate"
+
+
+def parse_args():
+    description = ('Benchmark the stages of the computation of '
+    'the tables for the axes or for the feasible axes. '
+    )
+    parser = ArgumentParser(description = description)
+    parser.add_argument("--baby",  dest="baby", action="store_true",
+        help = "Benchmark the computations for the feasible axes")
+    parser.add_argument("--stages",  dest="stages", nargs="+",
+        default=None, metavar="STAGE",
+        help = "Benchmark the given stages only (default: all stages)")
+    parser.add_argument("-b", "--baseline",  dest="baseline",
+        default=None, metavar="FILE",
+        help = "Compare the run times with the baseline in FILE")
+    parser.add_argument("-j", "--jobs",  dest="jobs", type=int,
+        default=None, metavar="N",
+        help="Use N processes for computing (default depends on CPUs)")
+    parser.add_argument("-o", "--output",  dest="output",
+        default=None, metavar="FILE",
+        help = "Write the run times to FILE in json format")
+    parser.add_argument("-s", "--seed",  dest="seed", type=int,
+        default=SEED, metavar="SEED",
+        help = "Seed for the random generators (default %d)" % SEED)
+    parser.add_argument("--tolerance",  dest="tolerance", type=float,
+        default=TOLERANCE, metavar="T",
+        help = ("Report stages slower than the baseline by a factor "
+                 "of more than 1 + T (default %.2f)" % TOLERANCE))
+    return parser.parse_args()
+
+
+def load_driver(baby):
+    """Load the script axis.py or baby_axis.py as a module
+
+    The function returns the dictionary of the global names of
+    the script. The main program of the script is not executed.
+    """
+    name = "baby_axis" if baby else "axis"
+    return runpy.run_path(name + ".py", run_name = "bench_" + name)
+
+
+def certificate_functions(baby):
+    """Return functions for generating and checking a certificate"""
+    if baby:
+        from make_baby_certificate import make_baby_certificate
+        from certificates.check_baby_axis_certificate import \
+            check_baby_certificate
+        return make_baby_certificate, check_baby_certificate
+    else:
+        from make_certificate import make_certificate
+        from certificates.check_axis_certificate import check_certificate
+        return make_certificate, check_certificate
+
+
+def run_benchmark(options):
+    """Run the benchmark and return its results as a dictionary"""
+    driver = load_driver(options.baby)
+    from requirements import get_mmgroup_version
+    from stages import run_stages
+    from scheduler import set_jobs, set_seed, shared_pool
+    from scheduler import default_processes
+    stages = driver["STAGES"]
+    stage_names = [stage.name for stage in stages]
+    all_names = stage_names + [MAKE_CERT, CHECK_CERT]
+    selected = options.stages if options.stages else all_names
+    for name in selected:
+        if name not in all_names:
+            err = "Unknown stage '%s', possible stages are: %s"
+            raise ValueError(err % (name, ", ".join(all_names)))
+    cert_name = os.path.basename(driver["CERTIFICATE_PATH"])
+    cert_path = os.path.join(BENCH_DIR, cert_name)
+    make_cert, check_cert = certificate_functions(options.baby)
+
+    set_jobs(options.jobs)
+    set_seed(options.seed)
+    times = {}
+    with shared_pool():
+        force = [name for name in selected if name in stage_names]
+        run_stages(driver["SHELVE_NAME"], stages, verbose = 1,
+            force = force, times = times)
+        if MAKE_CERT in selected:
+            t_start = time.perf_counter()
+            make_cert(cert_path)
+            times[MAKE_CERT] = time.perf_counter() - t_start
+    if CHECK_CERT in selected:
+        if not os.path.isfile(cert_path):
+            cert_path = driver["CERTIFICATE_PATH"]
+        t_start = time.perf_counter()
+        check_cert(cert_path, mp = True, processes = default_processes())
+        times[CHECK_CERT] = time.perf_counter() - t_start
+    return {
+        "tree": "baby_axis" if options.baby else "axis",
+        "seed": options.seed,
+        "processes": default_processes(),
+        "cpu_count": os.cpu_count(),
+        "mmgroup_version": list(get_mmgroup_version()),
+        "python_version": platform.python_version(),
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "times": {name: times[name] for name in all_names if name in times},
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Compare the run times in ``results`` with a baseline
+
+    The function displays the run times and returns the list of the
+    names of the stages that are slower than in the baseline by
+    a factor of more than ``1 + tolerance``.
+    """
+    if results["tree"] != baseline["tree"]:
+        err = "Baseline is for '%s', but results are for '%s'"
+        raise ValueError(err % (baseline["tree"], results["tree"]))
+    for key in ["seed", "processes", "mmgroup_version"]:
+        if results[key] != baseline.get(key):
+            print("Warning: %s differs from baseline: %s != %s" %
+                (key, results[key], baseline.get(key)))
+    slow = []
+    print("%-20s %10s %10s %8s" % ("Stage", "Baseline", "Time", "Ratio"))
+    for name, t in results["times"].items():
+        if name not in baseline["times"]:
+            print("%-20s %10s %10.2f" % (name, "-", t))
+            continue
+        t0 = baseline["times"][name]
+        ratio = t / t0 if t0 > 0 else 1.0
+        mark = ""
+        if ratio > 1.0 + tolerance:
+            slow.append(name)
+            mark = "  slower"
+        print("%-20s %10.2f %10.2f %8.2f%s" % (name, t0, t, ratio, mark))
+    return slow
+
+
+def display(results):
+    """Display the run times in ``results``"""
+    print("%-20s %10s" % ("Stage", "Time"))
+    for name, t in results["times"].items():
+        print("%-20s %10.2f" % (name, t))
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    for attr in ["output", "baseline"]:
+        if getattr(options, attr):
+            setattr(options, attr, os.path.abspath(getattr(options, attr)))
+    os.chdir(DIR)
+    sys.path.insert(0, DIR)
+    results = run_benchmark(options)
+    print("_" * 78)
+    print("Run times for '%s' in seconds, seed = %d, processes = %d:" %
+        (results["tree"], results["seed"], results["processes"]))
+    if options.output:
+        with open(options.output, "wt") as f:
+            json.dump(results, f, indent = 2)
+    if options.baseline:
+        with open(options.baseline, "rt") as f:
+            baseline = json.load(f)
+        slow = compare(results, baseline, options.tolerance)
+        if len(slow):
+            print("Stages slower than baseline:", ", ".join(slow))
+            sys.exit(1)
+    else:
+        display(results)
@@ -1,7 +1,9 @@
 import os
 import re
 import time
-from collections import Counter, OrderedDict, defaultdict
+import hashlib
+from collections import OrderedDict, defaultdict, namedtuple
+from multiprocessing import Pool
 import numpy as np
 
 # Standard classes implementing the Monster, G_x0, the Leech lattice
@@ -27,10 +29,8 @@ NUM_TYPE4_VECTORS = 8292375
 
 
 
-# The following stuff is required for the union-find algorithm only
-from mmgroup.generators import gen_ufind_init, gen_ufind_union_affine
-from mmgroup.generators import gen_ufind_find, gen_ufind_find_all_min
-from mmgroup.generators import gen_ufind_make_map
+# The following stuff is required for enumerating type-4 vectors only
+from mmgroup.generators import gen_leech2_type
 
 # regular expression object for parsing a line of the certificate 
 matchobj = re.compile(
@@ -61,20 +61,143 @@ def parse_line(s):
     else:
         return None, None, None
 
-def find_axes(certificate_path):
+######################################################################
+# Records of a certificate
+######################################################################
+
+# Legal tags of the lines of a certificate
+TAGS = ['axis', 'cent', 'orb', 'tau1', 'tau2', 'end']
+
+# A record obtained from a line of the certificate. Here ``tag`` and
+# ``value`` are as returned by function ``parse_line``. Component 
+# ``g`` is the element of the Monster in that line, given as a numpy
+# array containing a word of generators in mmgroup format; it is None
+# if no element is present. An element of the Monster can be 
+# reconstructed from ``g`` without parsing by calling ``MM0('a', g)``.
+Record = namedtuple("Record", ["tag", "value", "g"])
+
+
+def iter_records(lines):
+    """Yield the records of a certificate in a single pass
+
+    Here ``lines`` is an iterable yielding the lines of a certificate,
+    e.g. an open file. The function yields the records obtained from
+    these lines as instances of class ``Record``. Lines without a tag
+    are ignored. The function raises ValueError if an illegal tag
+    is found.
+    """
+    for s in lines:
+        tag, n, g = parse_line(s)
+        if tag is None:
+            continue
+        if tag not in TAGS:
+            raise ValueError("Illegal tag '%s' in certificate" % tag)
+        if g is not None:
+            g = MM0(g).mmdata
+        yield Record(tag, n, g)
+
+
+def compiled_certificate_path(certificate_path):
+    """Return the name of the file storing the compiled certificate"""
+    return os.path.splitext(certificate_path)[0] + ".npz"
+
+
+def save_records(path, records, digest):
+    """Store the records of a certificate in a compact binary form
+
+    The list ``records`` of records is stored in the ``.npz`` file
+    ``path``. The words of the elements of the Monster in the
+    records are stored as a packed array of 32-bit integers.
+    Parameter ``digest`` should be the SHA-256 digest of the text
+    of the certificate. 
+    """
+    tags = np.array([TAGS.index(r.tag) for r in records], dtype = np.uint8)
+    values = np.array(["" if r.value is None else str(r.value)
+        for r in records], dtype = np.str_)
+    has_g = np.array([r.g is not None for r in records], dtype = bool)
+    words = [r.g for r in records if r.g is not None]
+    offsets = np.zeros(len(records) + 1, dtype = np.int64)
+    offsets[1:] = np.cumsum([0 if r.g is None else len(r.g) 
+        for r in records])
+    data = np.concatenate(words + [np.zeros(0, dtype = np.uint32)])
+    np.savez(path, digest = np.array(digest), tags = tags,
+        values = values, has_g = has_g, offsets = offsets,
+        data = data.astype(np.uint32))
+
+
+def load_records(path, digest):
+    """Load records of a certificate from a file written by ``save_records``
+
+    The function returns the list of records stored in the ``.npz``
+    file ``path``. It returns None if that file does not exist, or
+    if it has not been computed from a certificate with the SHA-256
+    digest ``digest``.
+    """
+    try:
+        with np.load(path) as f:
+            if str(f["digest"]) != digest:
+                return None
+            tags, values, has_g = f["tags"], f["values"], f["has_g"]
+            offsets, data = f["offsets"], f["data"]
+    except (OSError, KeyError, ValueError):
+        return None
+    records = []
+    for i, tag in enumerate(tags):
+        n = str(values[i])
+        n = None if n == "" else int(n) if n.isdigit() else n
+        g = data[offsets[i]:offsets[i+1]] if has_g[i] else None
+        records.append(Record(TAGS[tag], n, g))
+    return records
+
+
+def read_certificate(certificate_path, compiled = False):
+    """Return the list of records of a certificate
+
+    The function reads the certificate ``certificate_path`` in a
+    single pass and returns the list of its records as instances
+    of class ``Record``.
+
+    By default the text of the certificate is parsed. If parameter
+    ``compiled`` is True then the records are also saved in a
+    compact binary form in a ``.npz`` file next to the
+    certificate, together with the SHA-256 digest of the text of
+    the certificate. A subsequent call to this function with
+    ``compiled`` True then reads the records from that file, without
+    parsing the text, provided that the digest of the certificate has
+    not changed. Then the correctness of the check also relies on the
+    correctness of the compiled file; so this is not the default.
+    """
+    with open(certificate_path, "rb") as f:
+        text = f.read()
+    digest = hashlib.sha256(text).hexdigest()
+    path = compiled_certificate_path(certificate_path)
+    if compiled:
+        records = load_records(path, digest)
+        if records is not None:
+            return records
+    lines = text.decode("utf-8").splitlines()
+    records = list(iter_records(lines))
+    if compiled:
+        try:
+            save_records(path, records, digest)
+        except OSError:
+            pass
+    return records
+
+
+def find_axes(records):
     """Pass through a certificate for finding  descriptions of axes
 
-    The function parses the lines of the file named
-    ``certificate_path`` and returns a dictionary containing the
+    The function scans the list ``records`` of records of a
+    certificate and returns a dictionary containing the
     axes found. This directory maps the axis names (given as strings)
     to the representatives of the G_x0 orbtis of the axes (given
     as elements of the Griess algebra). 
     """
     axis_dict = OrderedDict()
-    for s in open(certificate_path):
-        tag, n, g = parse_line(s)
+    for tag, n, g in records:
         if tag == "axis":
-            axis_dict[n] = STD_AXIS * MM0(g) 
+            axis_dict[n] = STD_AXIS * MM0('a', g) 
     return axis_dict
 
 
@@ -113,59 +236,179 @@ def img_Omega_G_x0(g):
     return x.ord & 0xffffff
 
 
-class UnionFindLeech2:
-    """Union-find algorithm for vectors in Leech lattice mod 2
+######################################################################
+# Orbits of subgroups of G_x0 on the type-4 vectors
+######################################################################
+
+# File caching the sorted list of type-4 vectors in the Leech lattice
+# mod 2 used by class ``Leech2Type4Index``. This file is stored in
+# subdirectory 'cache', which is removed by script cleanup.py.
+LEECH2_TYPE4_PATH = os.path.join(os.path.dirname(
+    os.path.realpath(__file__)), "cache", "leech2_type4.npy")
+
+# Bit weights of the bytes
+BITCOUNT8 = np.array([bin(i).count("1") for i in range(256)],
+    dtype = np.uint32)
+
+def bitcount32(a):
+    """Return the array of the bit weights of a uint32 array ``a``"""
+    a = np.asarray(a, dtype = np.uint32)
+    w = BITCOUNT8[a & 0xff] + BITCOUNT8[(a >> 8) & 0xff]
+    return w + BITCOUNT8[(a >> 16) & 0xff] + BITCOUNT8[a >> 24]
+
 
-    This class implements the union-find algorithm on the Leech
-    lattice mod 2.
+class Leech2Type4Index:
+    """Dense numbering of the type-4 vectors in the Leech lattice mod 2
+
+    The type-4 vectors in the Leech lattice mod 2 are numbered from
+    0 to ``NUM_TYPE4_VECTORS - 1`` in natural order. Here vectors
+    are encoded as integers representing bit vectors.
+
+    Member ``vectors`` is the sorted array of all type-4 vectors, so
+    that entry ``i`` of that array has number ``i``. Method ``rank``
+    maps an array of type-4 vectors to the array of their numbers.
+    It raises an exception if a vector is not of type 4.
+
+    Computing the array ``vectors`` takes a few seconds; so it is
+    cached in the file ``LEECH2_TYPE4_PATH``. Method ``rank`` uses
+    a bitmap of all type-4 vectors of size 2 MB and the prefix sums
+    of the bit weights of the 32-bit words of that bitmap.
+    """
+    def __init__(self, path = LEECH2_TYPE4_PATH):
+        self.vectors = self.load(path)
+        bits = np.zeros(0x1000000, dtype = bool)
+        bits[self.vectors] = True
+        self.words = np.packbits(bits, bitorder = "little").view(np.uint32)
+        self.prefix = np.zeros(len(self.words), dtype = np.uint32)
+        np.cumsum(bitcount32(self.words[:-1]), out = self.prefix[1:])
+    @staticmethod
+    def compute():
+        types = np.fromiter((gen_leech2_type(v) for v in range(0x1000000)),
+            dtype = np.uint8, count = 0x1000000)
+        return np.flatnonzero(types == 4).astype(np.uint32)
+    @staticmethod
+    def load(path):
+        try:
+            a = np.load(path, mmap_mode = "r")
+            ok = a.dtype == np.uint32 and len(a) == NUM_TYPE4_VECTORS
+            if ok and (a[1:] > a[:-1]).all() and a[-1] < 0x1000000:
+                return a
+        except (OSError, ValueError):
+            pass
+        a = Leech2Type4Index.compute()
+        assert len(a) == NUM_TYPE4_VECTORS
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+            tmp_path = path + ".%d.npy" % os.getpid() 
+            np.save(tmp_path, a)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+        return a
+    def rank(self, v):
+        v = np.asarray(v, dtype = np.uint32)
+        w = self.words[v >> 5]
+        b = np.left_shift(np.uint32(1), v & 31, dtype = np.uint32)
+        assert (w & b).all(), "Vector in Leech lattice is not of type 4"
+        return self.prefix[v >> 5] + bitcount32(w & (b - np.uint32(1)))
+
+
+# The instance of class ``Leech2Type4Index`` used in a process.
+# This is created by function ``leech2_type4_index``.
+LEECH2_TYPE4_INDEX = None
+
+def leech2_type4_index():
+    """Return the instance of class ``Leech2Type4Index`` of a process"""
+    global LEECH2_TYPE4_INDEX
+    if LEECH2_TYPE4_INDEX is None:
+        LEECH2_TYPE4_INDEX = Leech2Type4Index()
+    return LEECH2_TYPE4_INDEX
+
+
+# Array of NUM_TYPE4_VECTORS labels used by method ``orbit_sizes``
+# of class ``OrbitsLeech2Type4``. This is created by function
+# ``orbit_labels``, and it is reused for all axes checked in a process.
+ORBIT_LABELS = None
+
+def orbit_labels():
+    """Return the array ORBIT_LABELS of a process, filled with zeros"""
+    global ORBIT_LABELS
+    if ORBIT_LABELS is None:
+        ORBIT_LABELS = np.zeros(NUM_TYPE4_VECTORS, dtype = np.int32)
+    else:
+        ORBIT_LABELS.fill(0)
+    return ORBIT_LABELS
+
+
+class OrbitsLeech2Type4:
+    """Orbits of a subgroup of G_x0 on the type-4 vectors
+
+    This class computes orbits of a subgroup G of G_x0 on the
+    type-4 vectors in the Leech lattice mod 2.
 
     Method ``union_g`` called with parameter ``g``,  ``g`` in G_x0,
-    unites the vector ``v`` with the  vector ``v * g``, for all
-    vectors ``v`` in the Leech lattice mod 2.
-
-    Let G be the subgroup of G_x0 generated by all elements ``g``
-    previously passed to method ``union_g``. Then the equivalence
-    classes obtained after these calls to method ``union_g`` are
-    just the orbits of G on the Leech lattice mod 2.
-
-    Method ``find`` called with parameter ``v`` returns the
-    representative of the G orbit of ``v``. Here ``v`` and the
-    result are elements of the Leech lattice mod 2 encoded as
-    integers representing bit vectors.
-
-    Method ``counter`` returns a dictionary that maps the
-    representatives of the G orbits to sizes of the orbits.
-    Here the representatives are encoded as in method ``find``.
- 
-    Calls to method ``union_g`` are illegal after a call to
-    method ``find`` or ``counter``.
-
-    In theory there are faster methods for computing G orbits. But
-    our union-find algorithm is present in mmgroup, implemented
-    in C, and not related to the Monster group in any way.
+    adds ``g`` to the list of generators of G.
+
+    Method ``orbit_sizes`` called with a list of type-4 vectors 
+    returns the list of the sizes of the G orbits of these vectors.
+    It enumerates these orbits by breadth-first search over the
+    numbering of the type-4 vectors given by class 
+    ``Leech2Type4Index``. Since G is finite, an orbit is the
+    closure of a vector under the generators of G. So only the 
+    orbits of the given vectors are visited, but no other vectors.
+
+    For computing the images of many vectors under a generator we
+    use the fact that G_x0 acts linearly on the Leech lattice 
+    mod 2. So the image of a vector is the sum of the images of
+    its three bytes, which we look up in tables.
     """
     def __init__(self):
-        self.a = np.zeros(0x1000000, dtype = np.uint32)
-        self.finished = False
-        gen_ufind_init(self.a, len(self.a))
+        self.index = leech2_type4_index()
+        self.tables = []
     def union_g(self, g):
         assert isinstance(g, G_x0)
-        assert not self.finished
         gm = g.as_compressed_Co1_bitmatrix()
-        st = gen_ufind_union_affine(self.a, 24, gm, 0)
-        assert st >= 0
-    def find(self, v):
-        if not self.finished:
-            assert gen_ufind_find_all_min(self.a, len(self.a))  >= 0
-            self.finished = True
-        res = gen_ufind_find(self.a, len(self.a), v)
-        assert res >= 0
-        return res
-    def counter(self):
-        a_map = np.zeros(len(self.a), dtype = np.uint32)
-        self.find(0)
-        assert gen_ufind_make_map(self.a, len(self.a), a_map) >= 0
-        return Counter(a_map)
+        b = np.arange(256, dtype = np.uint32)
+        t = np.zeros((3, 256), dtype = np.uint32)
+        for k in range(3):
+            for i in range(8):
+                t[k] ^= ((b >> i) & 1) * np.uint32(gm[8*k + i])
+        self.tables.append(t)
+    def images(self, v):
+        """Return the images of an array ``v`` under all generators"""
+        v0, v1, v2 = v & 0xff, (v >> 8) & 0xff, v >> 16
+        return np.concatenate([t[0][v0] ^ t[1][v1] ^ t[2][v2]
+             for t in self.tables])
+    def orbit_sizes(self, vectors):
+        """Return the sizes of the G orbits of a list of vectors"""
+        index = self.index
+        labels = orbit_labels()
+        sizes = [None]
+        result = []
+        for v in vectors:
+            r = index.rank([v])
+            if labels[r[0]]:
+                result.append(sizes[labels[r[0]]])
+                continue
+            label = len(sizes)
+            labels[r] = label
+            size = 1
+            frontier = np.array([v], dtype = np.uint32)
+            while len(frontier):
+                r = index.rank(self.images(frontier))
+                r = r[labels[r] == 0]
+                # Remove duplicates from the array ``r``. Here we
+                # temporarily store negative positions in ``labels``.
+                seq = np.arange(-1, -len(r) - 1, -1, dtype = np.int32)
+                labels[r] = seq
+                r = r[labels[r] == seq]
+                labels[r] = label
+                size += len(r)
+                frontier = index.vectors[r]
+            sizes.append(size)
+            result.append(size)
+        return result
+
 
 def check_axis(ch):
     """Check data for an axis read from a certificate
@@ -176,7 +419,7 @@ def check_axis(ch):
 
     Let G be the subgroup of G_x0 generated by the list in member
     ``ch.centralizer``. We compute the orbits of G on the type-4
-    vectors in the Leech lattice mod 2 using class ``UnionFindLeech2``.
+    vectors in the Leech lattice mod 2 using class ``OrbitsLeech2Type4``.
     In a check prior to the call of this function we have already
     verified that G is a subgroup of the centralizer of the axis. 
 
@@ -201,16 +444,15 @@ def check_axis(ch):
     If any of these checks fails the function raisens an execption.
     """
     assert isinstance(ch, AxisChecker)
-    uf = UnionFindLeech2()
+    uf = OrbitsLeech2Type4()
     d = {}
     for g in ch.centralizer:
         uf.union_g(g)
     for orbit_size, h in ch.orbits:
         d[img_Omega_G_x0(h**-1)] = orbit_size
-    counter = uf.counter()
-    #print(counter)
-    for v, orbit_size in d.items():
-        assert counter[uf.find(v)] == orbit_size
+    sizes = uf.orbit_sizes(list(d.keys()))
+    for size, orbit_size in zip(sizes, d.values()):
+        assert size == orbit_size
     #print(sum(d.values()))
     assert sum(d.values()) == NUM_TYPE4_VECTORS
 
@@ -235,14 +477,13 @@ def get_suborbits_from_shelve():
         return None
      
 
-def get_suborbit_table_from_certificate(certificate_path):
-    """Return suborbit table computed from the certificate.
+def get_suborbit_table_from_certificate(records):
+    """Return suborbit table computed from the records of a certificate.
 
     This table corresponds to Table 2 in the paper.
     """
     d = defaultdict(int)
-    for s in open(certificate_path):
-        tag, n, g = parse_line(s)
+    for tag, n, g in records:
         if tag == 'axis':
             current_axis = n
         if tag == 'orb':
@@ -251,9 +492,11 @@ def get_suborbit_table_from_certificate(certificate_path):
             d[current_axis, n] += current_orbit_size
     return d
 
-def check_suborbits_against_shelve(certificate_path):
+def check_suborbits_against_shelve(records):
     """Check suborbit table computed from certificate against shelve.
 
+    Here ``records`` is the list of records of the certificate.
+
     This suborbit table is Table 2 in the paper.
     The function raises an exception if the suborbit table computed
     from the certificate differs from the corresponding table in the
@@ -264,7 +507,7 @@ def check_suborbits_against_shelve(certificate_path):
     if d_shelve is not None:
         print("""
 Computing Table 2 in the paper from the certificate ...""")
-        d_cert = get_suborbit_table_from_certificate(certificate_path)
+        d_cert = get_suborbit_table_from_certificate(records)
         assert d_cert == d_shelve, (d_cert , d_shelve)
         print("Table agrees with corresponding table in the shelve.")
     else:
@@ -274,7 +517,141 @@ No shelve containg a suitable suborbit table found!""")
         
 
 
-def check_certificate(certificate_path):
+def split_certificate(records):
+    """Split a certificate into blocks describing orbits of axes
+
+    The function returns the list of blocks of the certificate
+    in the order in which they occur. Here ``records`` is the list
+    of records of the certificate. Each block is a list of records.
+    It starts with a record with tag 'axis' and ends with the next
+    record with tag 'end'.
+
+    The blocks of a certificate can be checked independently.
+    Records outside a block are illegal.
+    """
+    blocks, block = [], None
+    for r in records:
+        if r.tag == 'axis':
+            assert block is None
+            block = []
+        assert block is not None, "Record outside a block in certificate"
+        block.append(r)
+        if r.tag == 'end':
+            blocks.append(block)
+            block = None
+    return blocks
+
+
+# Dictionary of axes obtained by function ``find_axes``. This is
+# used by function ``check_block``, and it is set by function 
+# ``init_block_checker``. Each worker process of a process pool 
+# has its own copy of this dictionary.
+AXIS_DICT = None
+
+def init_block_checker(axis_dict):
+    """Initialize a (worker) process for function ``check_block``"""
+    global AXIS_DICT
+    AXIS_DICT = axis_dict
+
+
+def check_reference_axis(axis, name):
+    """Check that ``axis`` is equal to the axis ``name`` in ``AXIS_DICT``
+
+    The function raises an exception if this is not the case. Then
+    the error message contains the names of all axes in ``AXIS_DICT``
+    equal to ``axis``.
+    """
+    if axis != AXIS_DICT[name]:
+        found = [n for n, ax in AXIS_DICT.items() if ax == axis]
+        s = "Axis in certificate is %s, expected %s"
+        raise AssertionError(s % (found if found else "unknown", name))
+
+
+def check_block(block, std_axis = STD_AXIS, G_x0 = G_x0, M = M,
+        check_axis = check_axis):
+    """Check a block of a certificate describing an orbit of an axis
+
+    Here ``block`` is a list of records of a certificate as returned
+    by function ``split_certificate``. Before calling this function,
+    function ``init_block_checker`` must be called with the dictionary
+    of axes obtained from the certificate by function ``find_axes``.
+
+    The function checks the lines in the block as described in
+    function ``check_certificate``, and it returns the name of the
+    axis described by the block. It raises an exception if the check
+    fails.
+
+    By default, the block describes an orbit of a 2A axis. For other
+    kinds of axes, parameter ``std_axis`` is the standard axis, and
+    ``G_x0`` and ``M`` are the constructors for elements of G_x0 and
+    of the Monster used for reading the block. Function
+    ``check_axis`` checks the object of class ``AxisChecker``
+    obtained from the block; default is function ``check_axis`` in
+    this module.
+    """
+    T1, T2 = M('t', 1), M('t', 2) 
+    last = None
+    for tag, n, g in block:
+        if tag == 'axis':
+             ch = AxisChecker()
+             ch.name, ch.axis = n, std_axis * M('a', g) 
+        if tag == 'cent':
+             c = G_x0('a', g) 
+             if n == 1:
+                 ch.centralizer.append(c)
+             assert ch.axis * c == ch.axis
+        if tag == 'orb':
+             orbit_size, g_orbit = n, G_x0('a', g)
+             orbit_axis = ch.axis * g_orbit
+        if tag == 'tau1':
+             assert last == 'orb'
+             tau_axis = orbit_axis * (T1 * M('a', g))
+             check_reference_axis(tau_axis, n)
+        if tag == 'tau2':
+             assert last == 'tau1'
+             tau_axis = orbit_axis * (T2 * M('a', g))
+             check_reference_axis(tau_axis, n)
+             ch.orbits.append([orbit_size, g_orbit]) 
+        if tag == 'end':
+             check_axis(ch)
+             return ch.name
+        last = tag
+    raise ValueError("Block in certificate is not terminated")
+
+
+def iter_check_blocks(f_check, blocks, axis_dict, mp = False,
+        processes = None):
+    """Check all blocks of a certificate
+
+    Here ``blocks`` is the list of blocks of the certificate as
+    returned by function ``split_certificate``; and ``axis_dict``
+    is the dictionary of axes returned by function ``find_axes``.
+    Each block is checked with function ``f_check``, e.g. with
+    function ``check_block``. The function yields the names of
+    the axes in the order given by the blocks, after the
+    corresponding block has been checked.
+
+    If ``mp`` is True then the blocks are checked in a pool of
+    ``processes`` processes; by default, we use one process per CPU.
+    Since the blocks are independent, the total run time is then
+    roughly the run time for checking the largest block.
+    """
+    if mp and processes is not None:
+        mp = processes > 1
+        processes = min(processes, len(blocks))
+    if mp:
+        with Pool(processes, initializer = init_block_checker,
+                initargs = (axis_dict,)) as pool:
+            yield from pool.imap(f_check, blocks)
+        pool.join()
+    else:
+        init_block_checker(axis_dict)
+        for block in blocks:
+            yield f_check(block)
+
+
+def check_certificate(certificate_path, mp = False, compiled = False,
+        processes = None):
     """Check the certificate for correctness.
 
     The function read the certificate given by parameter
@@ -313,51 +690,57 @@ def check_certificate(certificate_path):
     Table 2 in the paper. Here we check if the Table 2 computed
     in this way agrees with the Table 2 computed by the programs
     in subdirectory 'axis' of the project. 
+
+    The information about the different G_x0 orbits in the
+    certificate is independent. If parameter ``mp`` is True then
+    these orbits are checked in parallel in a pool of ``processes``
+    processes, see function ``iter_check_blocks``.
+
+    The certificate is read in a single pass with function
+    ``read_certificate``. If parameter ``compiled`` is True then
+    a compiled form of the certificate is used, or written if not
+    present, as described in that function.
     """
     start_time = time.time()
-    axis_dict = find_axes(certificate_path)
+    records = read_certificate(certificate_path, compiled)
+    axis_dict = find_axes(records)
+    # Create the numbering of the type-4 vectors before creating any
+    # worker processes, so that they may inherit it
+    leech2_type4_index()
     #print(axis_dict.keys())
-    last = None
     axes_found = set()
     print(f"Verifying certificate '{certificate_path}'")
     print("Orbits checked: ", end = "")
-  
-    for s in open(certificate_path):
-        tag, n, g = parse_line(s)
-        if tag == 'axis':
-             ch = AxisChecker()
-             ch.name, ch.axis = n, STD_AXIS * M(g) 
-        if tag == 'cent':
-             c = G_x0(g) 
-             if n == 1:
-                 ch.centralizer.append(c)
-             assert ch.axis * c == ch.axis
-        if tag == 'orb':
-             orbit_size, g_orbit = n, G_x0(g)
-             orbit_axis = ch.axis * g_orbit
-        if tag == 'tau1':
-             assert last == 'orb'
-             tau_axis = orbit_axis * T1 * M(g)
-             assert tau_axis ==  axis_dict[n]   
-        if tag == 'tau2':
-             assert last == 'tau1'
-             tau_axis = orbit_axis * T2 * M(g)
-             assert tau_axis ==  axis_dict[n] 
-             ch.orbits.append([orbit_size, g_orbit]) 
-        if tag == 'end':
-             check_axis(ch)
-             axes_found.add(ch.name)
-             print(ch.name, end = " ", flush = True)           
-             del ch 
-        last = tag
+    blocks = split_certificate(records)
+    for name in iter_check_blocks(check_block, blocks, axis_dict, mp,
+            processes):
+        axes_found.add(name)
+        print(name, end = " ", flush = True)           
     #print( set(axis_dict.keys()), axes_found)
     assert set(axis_dict.keys()) == axes_found
     t = time.time() - start_time
     print("\nCertificate is correct. Verifying took %.2f seconds" % t)
-    check_suborbits_against_shelve(certificate_path)
+    check_suborbits_against_shelve(records)
+
+
+def parse_args():
+    from argparse import ArgumentParser
+    description = ('Check a certificate for computing the number '
+    'of axes. ' 
+    )
+    parser = ArgumentParser(description = description)
+    parser.add_argument("-p",  dest="mp", action="store_true",
+        help = "Check the orbits of the axes in parallel")
+    parser.add_argument("-c",  dest="compiled", action="store_true",
+        help = "Use a compiled form of the certificate if present, "
+               "and write it otherwise")
+    options  = parser.parse_args()
+    return options
+
 
 if __name__ == "__main__":
+     options = parse_args()
      CERTIFICATE_PATH =  "axis_certificate.txt"
-     check_certificate(CERTIFICATE_PATH)
+     check_certificate(CERTIFICATE_PATH, options.mp, options.compiled)
 
 
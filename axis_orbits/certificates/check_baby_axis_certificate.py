@@ -27,12 +27,14 @@ FIXED_AXIS = Griess("A_2_2 - A_3_2 + A_3_3 - 2*B_3_2")
 # The involution \beta^+ in Q_x0 corresponding to  v^+
 FIXED_INVOLUTION = XLeech2(0, Cocode([2,3]))
 
-def G_x0(g_str):
-    """Map a string in the certificate to an element of G_x0
+def G_x0(*data):
+    """Map input to an element of G_x0
+
+    Input is as for the construtor of class Xsp2_Co1
 
     Raises an exception if the element is not in the Baby Monster
     """ 
-    g = Xsp2_Co1(g_str)
+    g = Xsp2_Co1(*data)
     assert FIXED_INVOLUTION * g == FIXED_INVOLUTION
     return g
 
@@ -60,24 +62,23 @@ NUM_FEASIBLE_TYPE4_VECTORS = 46575
 if __name__ == "__main__":
      sys.path.append(os.path.realpath(".."))
 
-# Parse a line of the certificate
-from certificates.check_axis_certificate import parse_line
+# Read the records of a certificate
+from certificates.check_axis_certificate import read_certificate
 
 
-def find_axes(certificate_path):
+def find_axes(records):
     """Pass through a certificate for finding  descriptions of axes
 
-    The function parses the lines of the file named
-    ``certificate_path`` and returns a dictionary containing the
+    The function scans the list ``records`` of records of a
+    certificate and returns a dictionary containing the
     axes found. This directory maps the axis names (given as strings)
     to the representatives of the G_x0 orbtis of the axes (given
     as elements of the Griess algebra). 
     """
     axis_dict = OrderedDict()
-    for s in open(certificate_path):
-        tag, n, g = parse_line(s)
+    for tag, n, g in records:
         if tag == "axis":
-            axis_dict[n] = STD_AXIS * MM0(g) 
+            axis_dict[n] = STD_AXIS * MM0('a', g) 
     return axis_dict
 
 
@@ -88,9 +89,10 @@ from certificates.check_axis_certificate import AxisChecker
 # Return image of Omega under the action of g, for g in G_x0
 from certificates.check_axis_certificate import img_Omega_G_x0
 
-# Union-find algorithm for vectors in Leech lattice mod 2.
-# For detals, see file check_axis_certificate.py
-from certificates.check_axis_certificate import UnionFindLeech2
+# Orbits of subgroups of G_x0 on the type-4 vectors in the Leech 
+# lattice mod 2. For detals, see file check_axis_certificate.py
+from certificates.check_axis_certificate import OrbitsLeech2Type4
+from certificates.check_axis_certificate import leech2_type4_index
 
 def check_axis(ch):
     """Check data for an axis read from a certificate
@@ -101,7 +103,7 @@ def check_axis(ch):
 
     Let G be the subgroup of G_x0 generated by the list in member
     ``ch.centralizer``. We compute the orbits of G on the type-4
-    vectors in the Leech lattice mod 2 using class ``UnionFindLeech2``.
+    vectors in the Leech lattice mod 2 using class ``OrbitsLeech2Type4``.
     In a check prior to the call of this function we have already
     verified that G is a subgroup of the centralizer of the axis. 
 
@@ -126,16 +128,15 @@ def check_axis(ch):
     If any of these checks fails the function raisens an execption.
     """
     assert isinstance(ch, AxisChecker)
-    uf = UnionFindLeech2()
+    uf = OrbitsLeech2Type4()
     d = {}
     for g in ch.centralizer:
         uf.union_g(g)
     for orbit_size, h in ch.orbits:
         d[img_Omega_G_x0(h**-1)] = orbit_size
-    counter = uf.counter()
-    #print(counter)
-    for v, orbit_size in d.items():
-        assert counter[uf.find(v)] == orbit_size
+    sizes = uf.orbit_sizes(list(d.keys()))
+    for size, orbit_size in zip(sizes, d.values()):
+        assert size == orbit_size
     #print(sum(d.values()))
     assert sum(d.values()) == NUM_FEASIBLE_TYPE4_VECTORS
 
@@ -160,14 +161,13 @@ def get_suborbits_from_shelve():
         return None
      
 
-def get_suborbit_table_from_certificate(certificate_path):
-    """Return suborbit table computed from the certificate.
+def get_suborbit_table_from_certificate(records):
+    """Return suborbit table computed from the records of a certificate.
 
     This table corresponds to Table 2 in the paper.
     """
     d = defaultdict(int)
-    for s in open(certificate_path):
-        tag, n, g = parse_line(s)
+    for tag, n, g in records:
         if tag == 'axis':
             current_axis = n
         if tag == 'orb':
@@ -176,9 +176,11 @@ def get_suborbit_table_from_certificate(certificate_path):
             d[current_axis, n] += current_orbit_size
     return d
 
-def check_suborbits_against_shelve(certificate_path):
+def check_suborbits_against_shelve(records):
     """Check suborbit table computed from certificate against shelve.
 
+    Here ``records`` is the list of records of the certificate.
+
     This suborbit table is Table 2 in the paper.
     The function raises an exception if the suborbit table computed
     from the certificate differs from the corresponding table in the
@@ -189,7 +191,7 @@ def check_suborbits_against_shelve(certificate_path):
     if d_shelve is not None:
         print("""
 Computing Table 4 in the paper from the certificate ...""")
-        d_cert = get_suborbit_table_from_certificate(certificate_path)
+        d_cert = get_suborbit_table_from_certificate(records)
         assert d_cert == d_shelve, (d_cert , d_shelve)
         print("Table agrees with corresponding table in the shelve.")
     else:
@@ -199,7 +201,28 @@ No shelve containg a suitable suborbit table found!""")
         
 
 
-def check_baby_certificate(certificate_path):
+# Split a certificate into blocks describing orbits of axes
+from certificates.check_axis_certificate import split_certificate
+
+# Check the blocks of a certificate, maybe in a pool of processes
+from certificates.check_axis_certificate import iter_check_blocks
+
+# Check a block of a certificate describing an orbit of an axis
+from certificates.check_axis_certificate import check_block
+
+
+def check_baby_block(block):
+    """Check a block of a certificate describing an orbit of an axis
+
+    This is the equivalent of function ``check_block`` in file
+    check_axis_certificate.py for feasible axes. It returns the name
+    of the axis described by the ``block``.
+    """
+    return check_block(block, STD_AXIS, G_x0, M, check_axis)
+
+
+def check_baby_certificate(certificate_path, mp = False, compiled = False,
+        processes = None):
     """Check the certificate for correctness.
 
     The function read the certificate given by parameter
@@ -238,51 +261,43 @@ def check_baby_certificate(certificate_path):
     Table 2 in the paper. Here we check if the Table 2 computed
     in this way agrees with the Table 2 computed by the programs
     in subdirectory 'axis' of the project. 
+
+    If parameter ``mp`` is True then the orbits in the certificate
+    are checked in parallel in a pool of ``processes`` processes, see
+    function ``iter_check_blocks`` in file check_axis_certificate.py.
+    If parameter ``compiled`` is True then a compiled form of the
+    certificate is used as described in function ``read_certificate``
+    in file check_axis_certificate.py.
     """
     start_time = time.time()
-    axis_dict = find_axes(certificate_path)
+    records = read_certificate(certificate_path, compiled)
+    axis_dict = find_axes(records)
+    # Create the numbering of the type-4 vectors before creating any
+    # worker processes, so that they may inherit it
+    leech2_type4_index()
     #print(axis_dict.keys())
-    last = None
     axes_found = set()
     print(f"Verifying certificate '{certificate_path}'")
     print("Orbits checked: ", end = "")
-  
-    for s in open(certificate_path):
-        tag, n, g = parse_line(s)
-        if tag == 'axis':
-             ch = AxisChecker()
-             ch.name, ch.axis = n, STD_AXIS * M(g) 
-        if tag == 'cent':
-             c = G_x0(g) 
-             if n == 1:
-                 ch.centralizer.append(c)
-             assert ch.axis * c == ch.axis
-        if tag == 'orb':
-             orbit_size, g_orbit = n, G_x0(g)
-             orbit_axis = ch.axis * g_orbit
-        if tag == 'tau1':
-             assert last == 'orb'
-             tau_axis = orbit_axis * T1 * M(g)
-             assert tau_axis ==  axis_dict[n]   
-        if tag == 'tau2':
-             assert last == 'tau1'
-             tau_axis = orbit_axis * T2 * M(g)
-             assert tau_axis ==  axis_dict[n] 
-             ch.orbits.append([orbit_size, g_orbit]) 
-        if tag == 'end':
-             check_axis(ch)
-             axes_found.add(ch.name)
-             print(ch.name, end = " ", flush = True)           
-             del ch 
-        last = tag
+    blocks = split_certificate(records)
+    for name in iter_check_blocks(check_baby_block, blocks, axis_dict, mp,
+            processes):
+        axes_found.add(name)
+        print(name, end = " ", flush = True)           
     #print( set(axis_dict.keys()), axes_found)
     assert set(axis_dict.keys()) == axes_found
     t = time.time() - start_time
     print("\nCertificate is correct. Verifying took %.2f seconds" % t)
-    check_suborbits_against_shelve(certificate_path)
+    check_suborbits_against_shelve(records)
+
+
+# Parse command line arguments 
+from certificates.check_axis_certificate import parse_args
+
 
 if __name__ == "__main__":
+     options = parse_args()
      CERTIFICATE_PATH =  "baby_axis_certificate.txt"
-     check_baby_certificate(CERTIFICATE_PATH)
+     check_baby_certificate(CERTIFICATE_PATH, options.mp, options.compiled)
 
 
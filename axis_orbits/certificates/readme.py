@@ -57,6 +57,23 @@ subdirectory 'certificates'. The certificate is created by
 invoking the python script 'axis.py' with the option
 '--make_cert'.
 
+The descriptions of the different G_x0-orbits in the certificate
+are independent. So they may be checked in parallel. Calling the
+script 'check_axis_certificate.py' with option '-p' checks these
+orbits in a pool of processes.
+
+The certificate is read in a single pass. By default the text of
+the certificate is parsed. With option '-c' the records read from
+a certificate are stored in a compiled binary form in a file with
+extension '.npz' next to the certificate. In this form all elements
+of the Monster are stored as words of generators in the internal
+format of the mmgroup package, so that they need not be parsed
+again. The compiled form also contains the SHA-256 digest of the
+text of the certificate; with option '-c' it is used only if that
+digest agrees with the digest of the certificate. So the compiled
+form is merely a cache; the text of the certificate remains the
+reference.
+
 
 Counting the feasible axes
 ==========================
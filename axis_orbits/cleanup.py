@@ -6,9 +6,9 @@ from argparse import ArgumentParser
 
 
 
-FILES = ["*.txt", "*.g"]
-DIRS = ["axis", "baby_axis", "certificates"]
-DEL_SUBDIRS = [ "shelve" ]
+FILES = ["*.txt", "*.g", "*.npz", "*.npy"]
+DIRS = ["axis", "baby_axis", "certificates", "bench"]
+DEL_SUBDIRS = [ "shelve", "cache" ]
 
 
 def path_join(*args):
@@ -51,7 +51,8 @@ def remove_intermediate_files(verbose = 0):
             pass
 
 
-SOURCE_DIRS = ["", "axis", "baby_axis", "utilities", "certificates", "scripts", ]
+SOURCE_DIRS = ["", "axis", "baby_axis", "utilities", "certificates", "scripts",
+    "bench"]
 SOURCE_FILES = ["*.py"]
 EXCLUDED = ["zipme.py"]
 ADDED_FILES = ["readme.txt"]
@@ -3,12 +3,59 @@ r"""Compute eigenspaces of an axis in the Griess algebra
 Yet to be documented
 """
 
+import os
+import sys
 from collections import defaultdict
+import numpy as np
 from mmgroup import  XLeech2
 
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+    "..", "utilities"))
+from utilities import parity
+sys.path.pop()
 
 
-def count_scalar_products_short():
+NUMBER_OF_SHORT_VECTORS = 98280
+
+# Sorted array of the short vectors in L2 (see below), computed
+# by function ``short_vectors``
+SHORT_VECTORS = None
+
+
+def short_vectors():
+    """Return the sorted array of the short vectors in L2
+
+    Here the vectors in L2 are encoded as 24-bit integers as in the
+    mmgroup package. The array is computed only once.
+    """
+    global SHORT_VECTORS
+    if SHORT_VECTORS is None:
+        a = [XLeech2('short', i).ord & 0xffffff
+            for i in range(NUMBER_OF_SHORT_VECTORS)]
+        SHORT_VECTORS = np.unique(np.array(a, dtype = np.uint32))
+        assert len(SHORT_VECTORS) == NUMBER_OF_SHORT_VECTORS
+    return SHORT_VECTORS
+
+
+def scalprod_mod2(a, w):
+    """Scalar products of an array ``a`` of vectors in L2 with ``w``
+
+    Vectors in L2 are encoded as in function ``short_vectors``.
+    The function returns the array of the scalar products (mod 2)
+    of the entries of ``a`` with the vector ``w``.
+    """
+    w = np.uint32(w & 0xffffff)
+    return parity(((a >> 12) & w ^ (w >> 12) & a) & 0xfff)
+
+
+def is_short(a):
+    """Return a boolean array; entry i is True if ``a[i]`` is short"""
+    table = short_vectors()
+    pos = np.minimum(np.searchsorted(table, a), len(table) - 1)
+    return table[pos] == a
+
+
+def count_scalar_products_short(beta = None, omega = None):
     """Count some scalar products of short vectors in the Leech lattice
 
     Here we write L for the Leech lattice and L2 for the Leech lattice
@@ -28,26 +75,35 @@ def count_scalar_products_short():
     a dictionary d. The key of d are pairs of integers (s, m).
     Then d[(s,m)] is the number of short vectors v in L2 with
     <v, \Omega> = m (mod 2) and <v, \beta> = s.
+
+    Other vectors \beta and \Omega (given as instances of class
+    XLeech2) with the same properties may be passed as arguments.
+
+    All short vectors are dealt with at once using numpy. For short
+    vectors v, \beta in L2 we have <v, \beta> = 4 if v = \beta. 
+    Otherwise <v, \beta> is 1 if <v, \beta> is odd; and 2 or 0 if 
+    v + \beta is short or not, respectively.
     """
     # mmgroup supports computation in the double cover Q_x0 of L2 only. 
-    OMEGA = XLeech2('Omega') # Preimage in Q_x0 of standard frame in L2
-    BETA = XLeech2(0, [2,3]) # Preimage in Q_x0 of short vector x_{2,3}
-    d = defaultdict(int)     # Result of the computation
+    # Preimage in Q_x0 of standard frame in L2
+    OMEGA = XLeech2('Omega') if omega is None else omega
+    # Preimage in Q_x0 of short vector x_{2,3}
+    BETA = XLeech2(0, [2,3]) if beta is None else beta
     # Let the type of a vector in L or L2 be as in [CS99], Ch. 10.3.3.
     assert BETA.type == (BETA * OMEGA).type == 2
     assert OMEGA.type == 4
-    NUMBER_OF_SHORT_VECTORS = 98280
-    for i in range(NUMBER_OF_SHORT_VECTORS):
-        # Let v be (a preimage in Q_x0 of) the i-th short vector in L2.
-        v = XLeech2('short', i)
-        # Compute scalar product <v, BETA> as
-        # type(v) + type(BETA) - type(v * BETA).
-        skalprod_beta = 4 - (v * BETA).type
-        assert skalprod_beta in [0, 1, 2, 4]
-        # Compute the scalar product <v, Omega> modulo 2.
-        skalprod_Omega = (v * OMEGA).type % 2
-        # Count the short vector v with these scalar products
-        d[skalprod_beta, skalprod_Omega] += 1
+    v = short_vectors()
+    beta_v = v ^ np.uint32(BETA.ord & 0xffffff)
+    odd = scalprod_mod2(v, BETA.ord) == 1
+    skalprod_beta = np.where(beta_v == 0, 4,
+        np.where(odd, 1, np.where(is_short(beta_v), 2, 0)))
+    skalprod_Omega = scalprod_mod2(v, OMEGA.ord)
+    # Count the short vectors v with these scalar products
+    keys, counts = np.unique(2 * skalprod_beta + skalprod_Omega,
+        return_counts = True)
+    d = defaultdict(int)     # Result of the computation
+    for key, n in zip(keys, counts):
+        d[int(key) >> 1, int(key) & 1] = int(n)
     assert d[(4,0)] == 1  # This counts the short vector BETA only 
     assert d[(4,1)] == 0  # Scalar product <BETA, OMEGA> is even
     # There must be a pairing between v and v + BETA
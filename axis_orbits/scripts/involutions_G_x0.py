@@ -52,11 +52,27 @@ probability and raises an exception in case of failure. Since this
 script should provide a proof, we use this conjugation method as
 an oracle, and we recalculate the corresponding conjugation
 operations in this script.
+
+The involutions in a coset I * Q_{x0} are found with linear algebra
+over GF(2), see function ``involutions_Q_x0``. Conjugation with
+elements of Q_{x0} maps I * Q_{x0} to itself; and we call the oracle
+for a few involutions only, such that every involution in the coset
+is conjugate to one of them under Q_{x0}, see function
+``check_involution``. These calls are done in a pool of processes.
 """
 
+import os
+import sys
+import numpy as np
 from mmgroup import MM, Xsp2_Co1, XLeech2
 from mmgroup.bitfunctions import pivot_binary_low, lin_table
 
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+    "..", "utilities"))
+from utilities import parity
+from scheduler import run_tasks, shared_pool
+sys.path.pop()
+
 ONE = Xsp2_Co1(1)               # neutral element of G_x0
 NEG = Xsp2_Co1('x', 0x1000)     # central involution x_{-1} in G_x0
 
@@ -65,6 +81,20 @@ I2C = Xsp2_Co1('y_0ae0h*d_20h') # involution mapping to class 2C in Co_1
 I2B = Xsp2_Co1('y_9d0h*d_700h*p_21289010')
                     # I2B squares to x_{-1} and maps to class 2B in Co_1 
 
+def centralizer_sign_basis(g):
+    """Return basis of the centralizer of g in Q_x0 (up to sign)
+
+    Let ``g`` be an element of the group G_x0 given as an instance
+    of class ``Xsp2_Co1``. The function returns a basis of the image
+    of the centralizer of ``g`` (up to sign) in the Leech lattice
+    mod 2, as a list of integers.
+    """
+    m = g.as_compressed_Co1_bitmatrix()
+    m_extended = [int(m[i]) ^ (0x1000001 << i) for i in range(24)] 
+    m_map, _ = pivot_binary_low(m_extended)
+    return [x >> 24 for x in m_map if x & 0xffffff == 0]
+
+
 def g_centralizer_sign(g):
     """Return centralizer of g in Q_x0 (up to sign)
 
@@ -76,11 +106,24 @@ def g_centralizer_sign(g):
     instances of class ``XLeech2``. The returned list contains
     only one of the elements q, q * x_{-1} of the centralizer. 
     """
-    m = g.as_compressed_Co1_bitmatrix()
-    m_extended = [int(m[i]) ^ (0x1000001 << i) for i in range(24)] 
-    m_map, _ = pivot_binary_low(m_extended)
-    m_ker =  [x >> 24 for x in m_map if x & 0xffffff == 0]
-    return  [XLeech2(x) for x in lin_table(m_ker)]
+    return  [XLeech2(x) for x in lin_table(centralizer_sign_basis(g))]
+
+
+def span(basis, values):
+    """Return the span of a basis of a space over GF(2)
+
+    Here ``basis`` is a list of linear independent bit vectors, and
+    ``values`` is the list of the values of a linear form on these
+    vectors. The function returns a pair of numpy arrays containing
+    all vectors in the span of the basis, and the values of the
+    linear form on these vectors.
+    """
+    a = np.zeros(1, dtype = np.uint32)
+    c = np.zeros(1, dtype = np.uint32)
+    for b, value in zip(basis, values):
+        a = np.concatenate((a, a ^ np.uint32(b)))
+        c = np.concatenate((c, c ^ np.uint32(value)))
+    return a, c
 
 
 def involutions_Q_x0(g):
@@ -88,24 +131,103 @@ def involutions_Q_x0(g):
 
     Here ``g`` must be an element of G_x0 that squares to 1 or x_{-1},
     encoded as an instance of class  ``Xsp2_Co1``. The function
-    returns the list of all involutions in the coset  g * Qx0. Entries
-    of the list are returned as instances of class ``Xsp2_Co1``.
+    returns the sorted array of all integers ``x`` (encoding elements
+    of Q_x0 as in class ``XLeech2``) such that ``Xsp2_Co1(x) * g``
+    is an involution.
+
+    Up to sign we have g**2 = 1 and q**2 = 1 for all q in Q_x0.
+    Thus any q in Q_x0 with (q * g)**2 == 1 must commute with g up
+    to sign. So q is in the preimage C of the centralizer returned
+    by function ``centralizer_sign_basis``. For q in C we have
+    g**-1 * q * g = q * x_{-1}**c(q), where c is linear on the image
+    of C in the Leech lattice mod 2. Also q**-1 = q * x_{-1}**t(q),
+    where t(q) is the quadratic form on Q_x0 given by the type of q
+    (mod 2). Now q * g is an involution if and only if
+    g**-1 * q * g = q**-1 * g**2, i.e. c(q) + t(q) = s, where
+    g**2 = x_{-1}**s. This condition is tested for all q in C at once.
     """
-    involution_list = []
     assert g * g in [ONE, NEG]
-    g_square = XLeech2(g * g)
-    # Up to sign we have g**2 = 1 and q**2 = 1 for all q in Q_x0.
-    # Thus any q in Q_x0 with (g * q)**2 == 1 must commute
-    # with g up to sign.
-    c_list = g_centralizer_sign(g) # centralizer of g up to sign
-    for xl in c_list:
-        # Let x = Xsp2_Co1(xl), with xl in class XLeech2.
-        # The following condition is equivalent to
-        # g**-1 * x * g = x**-1 * g*2, i.e.  (g**-1 * x)**2 == 1
-        if xl * g == xl**-1 * g_square:
-            xg = Xsp2_Co1(xl) * g
-            involution_list += [xg, xg * NEG]
-    return involution_list
+    s = (XLeech2(g * g).ord >> 24) & 1
+    basis = centralizer_sign_basis(g)
+    c_values = []
+    for b in basis:
+        b_conj = (XLeech2(b) * g).ord
+        assert b_conj & 0xffffff == b
+        c_values.append(b_conj >> 24)
+    q, c = span(basis, c_values)
+    t = parity((q >> 12) & q & 0xfff)
+    q = q[(c ^ t) == s]
+    return np.sort(np.concatenate((q, q | np.uint32(0x1000000))))
+
+
+def conjugation_image_basis(g):
+    """Return the space U spanned by the images of 1 + g
+
+    Let M be the matrix describing the action of ``g`` on the Leech
+    lattice mod 2. The function returns a basis of the image U of
+    the matrix 1 + M as a list of integers in reduced echelon form,
+    sorted by decreasing leading bits.
+
+    Conjugating an element q * g of the coset g * Q_x0 with an
+    element of Q_x0 mapping to a vector v in the Leech lattice mod 2
+    yields an element q' * g with q' = q + v * (1 + M**-1) up to sign
+    (in the Leech lattice mod 2). Since g**2 is in Q_x0, we have
+    M**-1 = M. So all elements q' * g with q' in q + U are conjugate
+    to q * g or to q * x_{-1} * g under the group Q_x0.
+    """
+    m = g.as_compressed_Co1_bitmatrix()
+    rows = [(int(m[i]) ^ (1 << i)) & 0xffffff for i in range(24)]
+    basis = []
+    for r in rows:
+        for b in basis:
+            if r & (1 << (b.bit_length() - 1)):
+                r ^= b
+        if r:
+            basis = [b ^ r if b & (1 << (r.bit_length() - 1)) else b
+                for b in basis]
+            basis.append(r)
+    return sorted(basis, reverse = True)
+
+
+def check_conjugation_image(g):
+    """Check the action of Q_x0 on the coset g * Q_x0
+
+    Let M be as in function ``conjugation_image_basis``. For each
+    basis vector v of the Leech lattice mod 2, we conjugate ``g``
+    with the element x_v of Q_x0 mapping to v, and we check that
+    the result is equal to q * g, with q mapping to v * (1 + M).
+    Since Q_x0 is commutative up to sign, conjugating q1 * g with
+    x_v yields q1 * q * g up to sign for all q1 in Q_x0. So this
+    check shows that conjugation with Q_x0 maps an element q1 * g to
+    the elements q' * g with q' in q1 + U (up to sign) as claimed in
+    function ``conjugation_image_basis``.
+
+    The function raises an exception if the check fails.
+    """
+    m = g.as_compressed_Co1_bitmatrix()
+    for i in range(24):
+        x = Xsp2_Co1(XLeech2(1 << i))
+        q = XLeech2(x**-1 * g * x * g**-1).ord & 0xffffff
+        assert q == (int(m[i]) ^ (1 << i)) & 0xffffff
+
+
+def coset_representatives(g, q):
+    """Return representatives of the cosets of U in an array ``q``
+
+    Here ``q`` is an array of elements of Q_x0 as returned by function
+    ``involutions_Q_x0``, and U is the space given by function
+    ``conjugation_image_basis``. The function returns the elements
+    of ``q`` which are the first ones in their coset q + U (ignoring
+    the signs), together with the numbers of the elements in these
+    cosets.
+    """
+    keys = q & np.uint32(0xffffff)
+    for b in conjugation_image_basis(g):
+        pivot = np.uint32(1 << (b.bit_length() - 1))
+        keys = np.where(keys & pivot, keys ^ np.uint32(b), keys)
+    _, index, counts = np.unique(keys, return_index = True,
+         return_counts = True)
+    return q[index], counts
 
 
 # Stadard 2A and 2B involutions in the Monster
@@ -115,43 +237,56 @@ STD_INVOLUTION = {1: MM('d', [2,3]), 2: MM(NEG)}
 #    Representatives of classes of involutions in G_x0 found so far
 Gx0_REPRESENTATIVES = []
 
-def reduce_involution(g, g_x0_representatives):
-    """Conjugate involution to standard 2A or 2B involution
+def conjugate_G_x0(g):
+    """Conjugate involution to a representative of its class in G_x0
+
+    This uses method ``conjugate_involution_G_x0`` of class
+    ``Xsp2_Co1`` as an oracle. The function returns ``g`` and
+    an element ``h`` of G_x0 such that ``g**h`` is the 
+    representative of the class of ``g``.
+    """
+    _, h = g.conjugate_involution_G_x0()
+    return g, h
+
+
+def reduce_involutions(involutions, g_x0_representatives):
+    """Conjugate involutions to standard 2A or 2B involutions
 
-    The function tries to conjugate the involution ``g`` to
-    the standard 2A or 2B involution in the Monster. ``g``
-    must be an instance of class ``Xsp2_Co1``.
-    The function  raises an exception in case of failure.
+    The function tries to conjugate the involutions in the list
+    ``involutions`` to the standard 2A or 2B involution in the
+    Monster. Entries of that list must be instances of class
+    ``Xsp2_Co1``. The function raises an exception in case of
+    failure.
 
     Conjugating an involution in G_x0 is much faster than in
     the Monster. So we maintain a list ``g_x0_representatives``
     of representatives of a class of an involution in G_x0.
     We first use method ``conjugate_involution_G_x0`` of class
-    ``Xsp2_Co1`` to conjugate ``g1`` to a representative of its
-    class in G_x0. If ``g1`` is not in the list
-    ``g_x0_representatives`` then we try to conjugate ``g1`` to
-    the standard 2A or 2B involution in the Monster; and we
-    append ``g1`` to that list. This final step can be dropped
-    if ``g1`` is already in that list.
+    ``Xsp2_Co1`` to conjugate ``g`` to a representative ``g1`` of
+    its class in G_x0; this is done in a pool of processes with
+    function ``run_tasks`` in file utilities/scheduler.py. If ``g1`` is not in the list ``g_x0_representatives``
+    then we try to conjugate ``g1`` to the standard 2A or 2B
+    involution in the Monster; and we append ``g1`` to that list.
+    This final step can be dropped if ``g1`` is already in that list.
     """
-    global Gx0_REPRESENTATIVES
-    assert g*g == ONE
     # We use the methods for conjugating involutions in classes
     # Xsp2_Co1 and MM as oracles for finding elements conjugating
     # ``g`` to the representatve of its class. But in this function
     # we check that these conjugations work as expected. We first 
     # conjugate in G_x0, since this is much faster than in M.  
-    _, h = g.conjugate_involution_G_x0()
-    g1 = g**h
-    if g1 not in g_x0_representatives:
-        # Then conjugate g1 in M to the representative of class
-        # 2A or 2B in the Monster M.
-        mg1 = MM(g1)
-        i, h = mg1.conjugate_involution()
-        # check that h conjugates g to a standard involution in M
-        assert mg1**h == STD_INVOLUTION[i]
-        # finally, append g1 to the list ``g_x0_representatives``
-        g_x0_representatives.append(g1)  
+    results = run_tasks(conjugate_G_x0, [(g,) for g in involutions])
+    for g, h in results:
+        assert g*g == ONE
+        g1 = g**h
+        if g1 not in g_x0_representatives:
+            # Then conjugate g1 in M to the representative of class
+            # 2A or 2B in the Monster M.
+            mg1 = MM(g1)
+            i, h = mg1.conjugate_involution()
+            # check that h conjugates g to a standard involution in M
+            assert mg1**h == STD_INVOLUTION[i]
+            # finally, append g1 to the list ``g_x0_representatives``
+            g_x0_representatives.append(g1)  
 
     
 def check_involution(name, g):
@@ -161,6 +296,12 @@ def check_involution(name, g):
     1 or x_{-1}. The function checks that all involutions in
     the coset g * Q_x0 are 2A or 2B involutions in the Monster.
     It raises an exception if this is not the cae.
+
+    We group the involutions q * g in the coset by the cosets
+    q + U, with U as in function ``conjugation_image_basis``. Then
+    all involutions in a group are conjugate to q * g or to
+    q * x_{-1} * g under Q_x0, for any fixed q in that group. So
+    it suffices to check these two involutions for each group.
     """
     # Store all involutions in g * Q_x0 in ``involution_list``
     involution_list = involutions_Q_x0(g)
@@ -171,9 +312,20 @@ def check_involution(name, g):
         # in the Monster. We also compute a list ``representatives``
         # such that every involution in ``involution_list`` is 
         # conjugate in G_x0 to an  involution in ``representatives``.
+        check_conjugation_image(g)
+        q_list, counts = coset_representatives(g, involution_list)
+        # Conjugation with Q_x0 maps an involution q * g to all
+        # q' * g, q' in q + U, up to sign; and if q * g is an
+        # involution then so is q * x_{-1} * g. So each group must
+        # contain precisely 2 * |U| involutions.
+        n_U = 1 << len(conjugation_image_basis(g))
+        assert (counts == 2 * n_U).all(), (set(counts), n_U)
+        checked = []
+        for q in q_list:
+            xg = Xsp2_Co1(XLeech2(int(q))) * g
+            checked += [xg, xg * NEG]
         representatives = []
-        for inv in involution_list:
-            reduce_involution(inv, representatives)
+        reduce_involutions(checked, representatives)
         print("All involutions are in class 2A or 2B in the Monster")
         # Next show that the involutions in the list ``representatives``
         # can be distiguished by their characters available in mmgroup.
@@ -199,8 +351,9 @@ and %d classes fusing to class 2B in the Monster"""
 CHI_299 = {'2A' : 43, '2B' : -13, '2C' : 11}
 
 if __name__ == "__main__":
-    for name, inv in zip(['2A', '2B', '2C'], [I2A, I2B, I2C]):
-        assert inv * inv in [ONE, NEG]
-        assert inv.chi_G_x0()[1] == CHI_299[name], inv.chi_G_x0()
-        check_involution(name, inv)
+    with shared_pool():
+        for name, inv in zip(['2A', '2B', '2C'], [I2A, I2B, I2C]):
+            assert inv * inv in [ONE, NEG]
+            assert inv.chi_G_x0()[1] == CHI_299[name], inv.chi_G_x0()
+            check_involution(name, inv)
 
@@ -7,15 +7,69 @@ corresponding names used in [Nor98].
 
 
 from multiprocessing import Pool, cpu_count
+import numpy as np
 from mmgroup import  MM, MMV
 from mmgroup.axes import Axis
+from mmgroup.mm_op import mm_op_word, mm_aux_zero_mmv
+from mmgroup.mm_op import mm_aux_index_extern_to_sparse
+from mmgroup.mm_op import mm_aux_mmv_set_sparse, mm_aux_mmv_extract_sparse
 
 
-def partial_trace(start, end, g, p):
-    """Auxiliary function for function ``trace_parallel``."""
+# Dimension of the representation of the Monster
+DIM = 196884
+
+# Number of basis vectors dealt with in a task of function
+# ``trace_parallel``. There are many more tasks than processes, so
+# that a process fetches the next task as soon as it is idle.
+CHUNK_SIZE = 2048
+
+# Dictionary mapping pairs ``(g, p)`` to the traces computed
+# by function ``trace_parallel``. Here ``g`` is the data of a
+# (reduced) element of the Monster as a bytes object.
+TRACES = {}
+
+# Data of the current worker process of function ``trace_parallel``:
+# the modulus p, the element g as an array of generators, a vector
+# of the representation for computing the images of the basis
+# vectors, and a work vector.
+WORKER = None
+
+
+def init_trace_worker(g, p):
+    """Initialize a process computing (partial) traces of ``g``
+
+    The vectors required in the process are allocated only once.
+    """
+    global WORKER
     V = MMV(p)
-    return sum([int((V([('E', i)]) * g)['E'][i])
-          for i in range(start, end)])
+    WORKER = p, np.array(g, dtype = np.uint32), V(0), V(0)
+
+
+def partial_trace(start, end):
+    """Auxiliary function for function ``trace_parallel``
+
+    The function returns the sum of the diagonal entries of the
+    matrix of ``g`` with indices ``start,...,end-1``, where ``g``
+    and ``p`` are as given by function ``init_trace_worker``.
+
+    For each basis vector we set one coordinate of the (zero)
+    vector ``v``, transform ``v`` with ``g`` in place, read the
+    same coordinate, and clear ``v`` again.
+    """
+    p, g, v, work = WORKER
+    sp = np.zeros(1, dtype = np.uint32)
+    trace = 0
+    for i in range(start, end):
+        index = mm_aux_index_extern_to_sparse(i)
+        sp[0] = index | 1
+        mm_aux_mmv_set_sparse(p, v.data, sp, 1)
+        res = mm_op_word(p, v.data, g, len(g), 1, work.data)
+        assert res >= 0
+        sp[0] = index
+        mm_aux_mmv_extract_sparse(p, v.data, sp, 1)
+        trace += int(sp[0] & 0xff)
+        mm_aux_zero_mmv(p, v.data)
+    return trace
 
 
 def trace_parallel(g, p, n_processes = None):
@@ -29,20 +83,29 @@ def trace_parallel(g, p, n_processes = None):
 
     The optional parameter ``n_processes`` may be used to control 
     the number of parallel processes. 
+
+    The basis vectors are split into chunks of size ``CHUNK_SIZE``,
+    and the chunks are processed in a pool of processes. Computed
+    traces are stored in the dictionary ``TRACES``; so the trace of
+    an element is computed only once.
     """
+    g = MM(g).reduce()
+    key = g.mmdata.tobytes(), p
+    if key in TRACES:
+        return TRACES[key]
     if n_processes is None:
         n_processes = max(1, cpu_count() - 1)
-    chunk_size = (196884 + n_processes - 1) // n_processes
-    jobs = []
-    for i in range(0, n_processes):
-        i_start = i * chunk_size
-        i_end = i_start + chunk_size if i < n_processes - 1 else 196884
-        jobs.append((i_start, i_end, g, p))
-
-    with Pool(processes = n_processes) as pool:
-        result = pool.starmap(partial_trace, jobs)
-    pool.join()
-    return sum(result) % p
+    jobs = [(i, min(i + CHUNK_SIZE, DIM)) for i in range(0, DIM, CHUNK_SIZE)]
+    initargs = (g.mmdata, p)
+    if n_processes == 1:
+        init_trace_worker(*initargs)
+        result = [partial_trace(*job) for job in jobs]
+    else:
+        with Pool(n_processes, init_trace_worker, initargs) as pool:
+            result = pool.starmap(partial_trace, jobs, chunksize = 1)
+        pool.join()
+    TRACES[key] = trace = sum(result) % p
+    return trace
 
 
  
@@ -2,7 +2,8 @@ r"""Accompanying code for 'The Order of the Monster Finite Simple Group'
 
 This subdirectory contains a few self-containd scripts used in the
 paper 'The Order of the Monster Finite Simple Group' by Gerald Hoehn
-und Martin Seysen.
+und Martin Seysen. Apart from the mmgroup package, they use only a
+few small helper functions in subdirectory 'utilities'.
 
 
 """
@@ -0,0 +1,83 @@
+r"""Store tuples of numpy arrays in files that can be mapped into memory
+
+Some tables, e.g. the tables of the orbits of the centralizers of the
+axes on the Leech lattice mod 2 stored in instances of class
+``Orbit_Lin2``, are too large for storing them in a shelve. Loading
+such a table from a shelve means unpickling the whole table.
+
+Here we store a dictionary mapping strings to tuples of numpy arrays
+in a directory. Each array is stored in a ``.npy`` file. The directory
+also contains a small index in the file ``index.json``. This index
+maps each key of the dictionary to a list of pairs
+``(filename, digest)``, one pair for each array in the tuple
+corresponding to the key. Here ``digest`` is the SHA-256 hash of
+the data of the array.
+
+Function ``load_arrays`` maps these arrays into memory. So the arrays
+are loaded on demand only; and they may be shared between processes.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+
+INDEX_NAME = "index.json"
+
+
+def array_digest(a):
+    """Return the SHA-256 digest of the data of a numpy array"""
+    a = np.ascontiguousarray(a)
+    return hashlib.sha256(memoryview(a).cast("B")).hexdigest()
+
+
+def save_arrays(path, d):
+    """Store a dictionary of tuples of arrays in the directory ``path``
+
+    Here ``d`` must map strings to tuples of numpy arrays. These
+    strings must be valid file names. The function returns the
+    index written to the file ``index.json`` as a dictionary.
+
+    An existing file is replaced by a new file (rather than
+    overwritten) so that it remains valid for a process mapping
+    that file into memory.
+    """
+    os.makedirs(path, exist_ok = True)
+    index = {}
+    for key, arrays in d.items():
+        entries = []
+        for i, a in enumerate(arrays):
+            filename = "%s_%d.npy" % (key, i)
+            tmp_path = os.path.join(path, "tmp_" + filename)
+            np.save(tmp_path, a)
+            os.replace(tmp_path, os.path.join(path, filename))
+            entries.append((filename, array_digest(a)))
+        index[key] = entries
+    tmp_path = os.path.join(path, "tmp_" + INDEX_NAME)
+    with open(tmp_path, "wt") as f:
+        json.dump(index, f, indent = 1)
+    os.replace(tmp_path, os.path.join(path, INDEX_NAME))
+    return index
+
+
+def load_index(path):
+    """Return the index of the arrays stored in the directory ``path``"""
+    with open(os.path.join(path, INDEX_NAME), "rt") as f:
+        index = json.load(f)
+    return {key: [tuple(e) for e in entries]
+        for key, entries in index.items()}
+
+
+def load_arrays(path, mmap_mode = "c"):
+    """Load a dictionary of tuples of arrays from the directory ``path``
+
+    This reverses the effect of function ``save_arrays``. By default,
+    the arrays are mapped into memory in copy-on-write mode. This
+    means that they may be changed, but these changes are not
+    written back to the files.
+    """
+    d = {}
+    for key, entries in load_index(path).items():
+        d[key] = tuple(np.load(os.path.join(path, filename),
+            mmap_mode = mmap_mode) for filename, _ in entries)
+    return d
+
@@ -0,0 +1,195 @@
+r"""Compute the G_x0 orbits of many axes at once
+
+Many scripts in subdirectories 'axis' and 'baby_axis' compute the
+orbit of an axis under the group G_x0 (or H) with method
+``axis_type``, and an element of G_x0 (or H) reducing the axis with
+method ``reduce_G_x0``, for all N_x0 orbits of the axes. Here an axis
+is usually given as a pair ``(name, g)``, where ``name`` is the name
+of a representative of a G_x0 orbit and ``g`` is a group element, so
+that the axis is ``Axis.representatives()[name] * g``.
+
+Function ``classify_axes`` deals with a list of such axes. Identical
+axes (i.e. equal pairs ``(name, g)``, with ``g`` given as equal words
+of generators) are dealt with only once. The list of axes is split
+into chunks, and the chunks are processed with function ``run_tasks``
+in module ``scheduler``. Only the names of the representatives and
+the words of the group elements are sent to the worker processes.
+
+For instances of class ``Axis``, the types of the axes ``ax * g``
+with ``g`` in G_x0 are computed by the C function
+``mm_reduce_op_2A_axis_type`` in the mmgroup package, without
+computing the axis ``ax * g`` in python.
+"""
+import numpy as np
+
+from mmgroup import MM0
+from mmgroup.axes import Axis
+
+from scheduler import run_tasks
+
+try:
+    from mmgroup.mm_reduce import mm_reduce_op_2A_axis_type
+except (ImportError, ModuleNotFoundError):
+    mm_reduce_op_2A_axis_type = None
+
+
+# Number of axes dealt with in a task
+CHUNK_SIZE = 64
+
+# Dictionary mapping a class of axes to its representatives; this
+# is filled on demand in each process.
+REPRESENTATIVES = {}
+
+
+def representatives(axis_class):
+    """Return the dictionary ``axis_class.representatives()``"""
+    try:
+        return REPRESENTATIVES[axis_class]
+    except KeyError:
+        reps = REPRESENTATIVES[axis_class] = axis_class.representatives()
+        return reps
+
+
+def axis_type_name(o):
+    """Return the name of an axis type given by its code
+
+    Here the code ``o`` of an axis type as returned by function
+    ``mm_reduce_op_2A_axis_type`` encodes the name e.g. '10A' as
+    0xA1, i.e. the number of the name in bits 7...4 and the letter
+    in bits 3...0.
+    """
+    assert 0x11 <= o < 0xC6
+    return str(o >> 4) + "?ABCDEFGH"[o & 0xf]
+
+
+def word(g):
+    """Return group element ``g`` as a numpy array of generators"""
+    if isinstance(g, np.ndarray):
+        return np.array(g, dtype = np.uint32)
+    return np.array(g.mmdata, dtype = np.uint32)
+
+
+def axis_key(axis):
+    """Convert an axis to a pair ``(name, word)``
+
+    ``axis`` may be an instance of class ``Axis`` or ``BabyAxis``, or
+    a pair ``(name, g)`` as described in function ``classify_axes``.
+    For an instance ``ax`` of class ``Axis``, ``name`` is None and
+    ``word`` is the element ``ax.g`` mapping the start axis to ``ax``.
+    """
+    if isinstance(axis, Axis):
+        return None, word(axis.g)
+    name, g = axis
+    return name, word(g)
+
+
+def make_axis(axis_class, name, g):
+    """Inverse of function ``axis_key``"""
+    start = axis_class() if name is None else representatives(
+        axis_class)[name]
+    return start * MM0('a', g)
+
+
+def c_axis_types(axis_class, name, g, exponents):
+    """Compute the types of axes with function in the C library
+
+    Put ``ax = axis_class.representatives()[name]``. The function
+    returns the list of the names of the types of the axes
+    ``ax * g * t**e`` for ``e`` in ``exponents``, where ``t`` is the
+    triality element. It returns None if the function in the C
+    library cannot compute these types, e.g. if ``g`` is not in
+    G_x0.
+    """
+    if (mm_reduce_op_2A_axis_type is None or axis_class is not Axis
+            or name is None):
+        return None
+    ax_d = representatives(axis_class)[name].v15.data
+    mode = 0x10
+    for e in exponents:
+        mode |= 1 << e
+    res = mm_reduce_op_2A_axis_type(ax_d, g, len(g), mode)
+    codes = [(res >> (8 * e)) & 255 for e in exponents]
+    if 0 in codes:
+        return None
+    return [axis_type_name(o) for o in codes]
+
+
+def classify_chunk(axis_class, chunk, exponents, reduce):
+    """Classify a chunk of axes as in function ``classify_axes``
+
+    Here ``chunk`` is a list of pairs ``(name, word)`` as returned by
+    function ``axis_key``. Reducing elements are returned as numpy
+    arrays.
+    """
+    results = []
+    for name, g in chunk:
+        types = None if reduce else c_axis_types(
+            axis_class, name, g, exponents)
+        h = None
+        if types is None:
+            axis = make_axis(axis_class, name, g)
+            types = [axis.axis_type(e) for e in exponents]
+            if reduce:
+                h = word(axis.reduce_G_x0())
+        results.append((tuple(types), h))
+    return results
+
+
+def classify_axes(axes, axis_class = Axis, exponents = (0,),
+        reduce = False, mp = True, chunk_size = CHUNK_SIZE):
+    """Compute the G_x0 orbits of a list of axes
+
+    Each entry of the list ``axes`` is either an instance of class
+    ``axis_class`` or a pair ``(name, g)``. Such a pair denotes the
+    axis ``axis_class.representatives()[name] * g``. Here ``g`` is an
+    element of the Monster (or a numpy array containing such an
+    element as a word of generators). ``axis_class`` must be class
+    ``Axis`` or ``BabyAxis``.
+
+    The function returns a list of pairs ``(types, h)``, with one
+    entry for each entry ``ax`` of ``axes``. Here ``types`` is the
+    tuple of the names of the orbits of the axes ``ax * t**e``, for
+    ``e`` in ``exponents``, as returned by method ``ax.axis_type(e)``.
+    If ``reduce`` is True then ``h`` is the element of G_x0 (or H)
+    mapping ``ax`` to the representative of its orbit, as returned
+    by method ``ax.reduce_G_x0()``; otherwise ``h`` is None.
+
+    Parameter ``mp`` is as in function ``run_tasks`` in module
+    ``scheduler``. If ``mp`` is False then all axes are classified
+    in the current process without calling function ``run_tasks``;
+    this is appropriate in a task run by function ``run_tasks``.
+    """
+    exponents = tuple(e % 3 for e in exponents)
+    keys = [axis_key(ax) for ax in axes]
+    index, unique = {}, []
+    positions = []
+    for name, g in keys:
+        k = name, g.tobytes()
+        if k not in index:
+            index[k] = len(unique)
+            unique.append((name, g))
+        positions.append(index[k])
+    if mp:
+        chunks = [unique[i : i + chunk_size]
+            for i in range(0, len(unique), chunk_size)]
+        args = [(axis_class, chunk, exponents, reduce) for chunk in chunks]
+        labels = [[axis_class.__name__, i] for i in range(len(chunks))]
+        results = []
+        for res in run_tasks(classify_chunk, args,
+                costs = [len(chunk) for chunk in chunks], labels = labels):
+            results += res
+    else:
+        results = classify_chunk(axis_class, unique, exponents, reduce)
+    results = [(types, None if h is None else MM0('a', h))
+        for types, h in results]
+    return [results[i] for i in positions]
+
+
+def axis_types(axes, axis_class = Axis, e = 0, mp = True):
+    """Return the list of the orbits of a list of axes
+
+    This is equivalent to ``[ax.axis_type(e) for ax in axes]``,
+    with ``axes`` and ``axis_class`` as in function ``classify_axes``.
+    """
+    results = classify_axes(axes, axis_class, (e,), mp = mp)
+    return [types[0] for types, _ in results]
@@ -0,0 +1,240 @@
+r"""Run a list of tasks of uneven cost in a pool of processes
+
+Many computations in subdirectories 'axis' and 'baby_axis' consist
+of one task for each orbit of the group G_x0 (or H) on the axes.
+The cost of these tasks is very uneven. E.g. the orbit '2A' has
+just a few N_x0 orbits, while other orbits have hundreds of them.
+If we run one task per orbit in a pool of processes then most
+processes are idle while the largest task is still running.
+
+So we split a computation into many small tasks, and we run these
+tasks in a pool of processes with function ``run_tasks``. Each
+process fetches the next pending task as soon as it has finished
+a task. If an estimate of the cost of each task is given then the
+tasks are submitted in the order of decreasing cost, so that the
+expensive tasks do not end up at the end of the computation.
+
+Tasks should be small: a task is pickled and sent to a worker
+process. Large tables required by the tasks should be loaded by
+an initializer function in each worker process, e.g. by mapping
+them into memory.
+
+Starting a pool of processes is not for free. So a script running
+several stages of a computation may create a single pool with
+function ``shared_pool``; then all calls to function ``run_tasks``
+use that pool. Function ``set_jobs`` sets the number of processes
+in a pool. If that number is 1 then all tasks are run in the
+current process.
+
+For reproducing a computation, function ``set_seed`` fixes a seed
+for the random generators. Then the random generators are seeded
+before running each task, depending on that seed and on the
+position of the task. So the results do not depend on the process
+running a task.
+
+If tracing is enabled in module ``trace_events`` then function
+``run_tasks`` records an event for each task and the utilization
+of the worker processes.
+"""
+import os
+import time
+import random
+import numpy as np
+from contextlib import contextmanager
+from multiprocessing import Pool
+
+import trace_events
+from trace_events import span, events_since, add_events, utilization
+
+# Maximum number of processes in a pool
+MAX_PROCESSES = 16
+
+# Number of processes in a pool as set by function ``set_jobs``
+JOBS = None
+
+# Pool of processes created by function ``shared_pool``
+SHARED_POOL = None
+
+# Number of calls to function ``run_tasks``. This is used for
+# calling the initializer in the worker processes once per call.
+N_CALLS = 0
+
+# Value of N_CALLS in the last call to the initializer in a worker
+INITIALIZED = None
+
+# Seed for the random generators as set by function ``set_seed``
+SEED = None
+
+
+def set_jobs(processes = None):
+    """Set the number of processes in a pool
+
+    If ``processes`` is None then a default depending on the number
+    of CPUs is used.
+    """
+    global JOBS
+    assert processes is None or processes >= 1
+    JOBS = processes
+
+
+def seed_random_generators(seed):
+    """Seed all random generators used in our computations
+
+    These are the random generators of the python modules ``random``
+    and ``numpy``, and the random generator of the mmgroup package.
+    """
+    from mmgroup.generators import rand_get_seed, gen_rng_seed_no
+    random.seed(seed)
+    np.random.seed(seed & 0xffffffff)
+    gen_rng_seed_no(rand_get_seed(), seed)
+
+
+def set_seed(seed = None):
+    """Set a seed for the random generators used in all tasks
+
+    If ``seed`` is an integer then the random generators are seeded
+    with function ``seed_random_generators`` before running a task.
+    Here the seed depends on ``seed`` and on the position of the
+    task in the sequence of all calls to function ``run_tasks``.
+    If ``seed`` is None (default) then the random generators are
+    not seeded.
+    """
+    global SEED
+    SEED = seed
+    if seed is not None:
+        seed_random_generators(seed)
+
+
+def default_processes():
+    """Return the default number of processes in a pool"""
+    if JOBS is not None:
+        return JOBS
+    return max(1, min(MAX_PROCESSES, (os.cpu_count() or 1) - 2))
+
+
+@contextmanager
+def shared_pool():
+    """Context manager for a pool shared by all calls to ``run_tasks``
+
+    The number of processes in the pool is as given by function
+    ``default_processes``. If this number is 1 then no pool is
+    created. The worker processes are forked at the beginning of
+    the context. So modules and tables required by all tasks
+    should be loaded before entering the context.
+    """
+    global SHARED_POOL
+    assert SHARED_POOL is None
+    processes = default_processes()
+    if processes <= 1:
+        yield None
+        return
+    with Pool(processes) as pool:
+        SHARED_POOL = pool
+        try:
+            yield pool
+        finally:
+            SHARED_POOL = None
+    pool.join()
+
+
+def _task_label(args):
+    """Return default label of a task with arguments ``args``
+
+    This is the list of the arguments of type ``str`` or ``int``.
+    """
+    return [x for x in args
+        if isinstance(x, (str, int)) and not isinstance(x, bool)]
+
+
+def _run_task(task):
+    global INITIALIZED
+    n_call, seed, label, initializer, initargs, index, function, args = task
+    if initializer is not None and INITIALIZED != n_call:
+        initializer(*initargs)
+        INITIALIZED = n_call
+    if seed is not None:
+        seed = hash((seed, n_call, index)) & 0xffffffffffff
+        seed_random_generators(seed)
+    if label is None:
+        return index, function(*args), []
+    trace_events.TRACING = True
+    n_events = len(trace_events.EVENTS)
+    with span(function.__name__, "task", label = label):
+        result = function(*args)
+    return index, result, events_since(n_events)
+
+
+def run_tasks(function, args_list, costs = None, mp = True,
+        initializer = None, initargs = (), labels = None):
+    """Apply a function to a list of arguments in a pool of processes
+
+    Here ``args_list`` is a list of tuples. For each entry ``args``
+    of that list we compute ``function(*args)``. The function returns
+    the list of these results in the same order as ``args_list``.
+
+    If ``costs`` is given, it must be a list of the estimated costs
+    of the tasks, with one entry for each entry of ``args_list``.
+    Then the tasks are started in the order of decreasing cost.
+
+    If ``mp`` is True then the tasks are run in the pool created by
+    function ``shared_pool``. If no such pool exists then a pool is
+    created for running the tasks. In each worker process function
+    ``initializer`` is called with arguments ``initargs`` before
+    running the first task of this call. If ``mp`` is False, or if
+    the pool would have just one process, then all tasks are run in
+    the current process; then the initializer is not called.
+
+    ``function`` and ``initializer`` must be functions defined at
+    the top level of a module, so that they can be pickled.
+
+    If tracing is enabled then ``labels`` may be a list of labels
+    of the tasks shown in the trace, with one entry for each entry
+    of ``args_list``. By default, the label of a task is the list
+    of its arguments of type ``str`` or ``int``.
+    """
+    global N_CALLS
+    N_CALLS += 1
+    args_list = list(args_list)
+    n = len(args_list)
+    order = list(range(n))
+    if costs is not None:
+        assert len(costs) == n
+        order.sort(key = lambda i: -costs[i])
+    sequential = not mp or n <= 1 or default_processes() <= 1
+    if sequential:
+        initializer = None
+    trace = trace_events.tracing()
+    if not trace:
+        labels = [None] * n
+    elif labels is None:
+        labels = [_task_label(args) for args in args_list]
+    tasks = [(N_CALLS, SEED, labels[i], initializer, tuple(initargs), i,
+        function, tuple(args_list[i])) for i in order]
+    results = [None] * n
+    events = []
+    name = "run_tasks " + function.__name__
+    with span(name, "run_tasks", tasks = n) as trace_args:
+        t_start = time.perf_counter()
+        if sequential:
+            for task in tasks:
+                i, results[i], ev = _run_task(task)
+                events += ev
+        elif SHARED_POOL is not None:
+            for i, result, ev in SHARED_POOL.imap_unordered(_run_task, tasks):
+                results[i] = result
+                events += ev
+        else:
+            processes = min(default_processes(), n)
+            with Pool(processes) as pool:
+                for i, result, ev in pool.imap_unordered(_run_task, tasks):
+                    results[i] = result
+                    events += ev
+            pool.join()
+        if trace:
+            t_end = time.perf_counter()
+            tasks_events = [e for e in events if e["cat"] == "task"]
+            trace_args["utilization"] = utilization(
+                tasks_events, t_start, t_end)
+    add_events(events)
+    return results
+
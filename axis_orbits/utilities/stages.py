@@ -0,0 +1,235 @@
+r"""Incremental recomputation of the tables stored in a shelve
+
+The tables required for the computations in subdirectories 'axis'
+and 'baby_axis' are computed in several stages. Each stage writes
+some entries into a shelve, and it may read entries written by
+previous stages. A stage is described by an instance of class
+``Stage``.
+
+Function ``run_stages`` runs a list of stages. It runs a stage only
+if the entries written by that stage are missing or out of date.
+For each stage we store a record in the shelve under the key
+``STAGE_RECORDS``. Such a record contains a key obtained by hashing
+
+  - the source files of the stage and the parameters of the stage,
+  - the version of the mmgroup package,
+  - the digests of the entries of the shelve read by the stage,
+
+and the digests of the entries of the shelve written by the stage.
+The source files of a stage are the file containing the function
+running the stage, and all files in this package imported by that
+file, directly or indirectly, see function ``source_files``.
+A stage is out of date if the key computed from the current data
+differs from the key in the record.
+
+Here the digest of an entry is the SHA-256 hash of the pickled entry.
+If a stage is recomputed, but the entries written by that stage do
+not change, then the subsequent stages need not be recomputed.
+
+Entries of the shelve that are written by a script outside of
+function ``run_stages`` are not recorded. After running such a
+script the shelve should be recomputed from scratch.
+"""
+import os
+import time
+import ast
+import shelve
+import pickle
+import hashlib
+import importlib
+import importlib.util
+from collections import namedtuple
+
+from requirements import get_mmgroup_version
+from trace_events import span
+
+
+# Description of a stage of a computation.
+#
+# ``name``     Name of the stage.
+#
+# ``function`` Pair of strings (module, function name). The stage
+#              is run by calling that function with keyword
+#              arguments ``params``. The module is imported when
+#              the stage is run. The file containing the module
+#              and the files imported by it are source files of
+#              the stage.
+#
+# ``outputs``  List of the names of the entries of the shelve
+#              written by the stage.
+#
+# ``depends``  List of the names of the stages that write the
+#              entries of the shelve read by the stage.
+#
+# ``sources``  List of the names of additional modules used by the
+#              stage that are not found in import statements, e.g.
+#              modules imported with function importlib.import_module.
+#
+# ``params``   Dictionary of keyword arguments for the function
+#              running the stage.
+Stage = namedtuple("Stage",
+    ["name", "function", "outputs", "depends", "sources", "params"])
+
+# Key of the entry of the shelve containing the records of the stages
+STAGE_RECORDS = "STAGE_RECORDS"
+
+
+class _HashWriter:
+    """File-like object computing the SHA-256 hash of the data written"""
+    def __init__(self):
+        self.hash = hashlib.sha256()
+    def write(self, data):
+        self.hash.update(data)
+
+
+def digest(obj):
+    """Return SHA-256 digest of the pickled object ``obj``"""
+    f = _HashWriter()
+    pickle.Pickler(f, protocol = 4).dump(obj)
+    return f.hash.hexdigest()
+
+
+def source_file(module_name):
+    """Return the name of the file containing a module
+
+    The module is not imported.
+    """
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or spec.origin is None:
+        raise ModuleNotFoundError(module_name)
+    return spec.origin
+
+
+# Directory containing the subdirectories 'axis', 'baby_axis', and
+# 'utilities'. Only modules in this directory are source files of a
+# stage; installed packages are covered by their version numbers.
+LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def local_source_file(module_name):
+    """Return the file containing a module in directory LOCAL_PATH
+
+    The function returns None if the module is not found in that
+    directory. The module is not imported.
+    """
+    try:
+        spec = importlib.util.find_spec(module_name.split(".")[0])
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.has_location:
+        return None
+    path = os.path.realpath(spec.origin)
+    if not path.startswith(LOCAL_PATH + os.sep):
+        return None
+    return path
+
+
+def imported_modules(path):
+    """Return the names of the modules imported in a source file
+
+    This includes the modules imported inside functions.
+    """
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), path)
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names.append(node.module)
+    return names
+
+
+def source_files(module_names):
+    """Return the source files of a stage
+
+    ``module_names`` is the list of the names of the modules used by
+    the stage. The function returns the sorted list of the files
+    containing these modules and all modules in directory LOCAL_PATH
+    imported by them, directly or indirectly.
+    """
+    files = set()
+    pending = [source_file(name) for name in module_names]
+    while len(pending):
+        path = pending.pop()
+        if path in files:
+            continue
+        files.add(path)
+        for name in imported_modules(path):
+            imported = local_source_file(name)
+            if imported is not None:
+                pending.append(imported)
+    return sorted(files)
+
+
+def stage_key(stage, records):
+    """Return the key of a stage
+
+    Here ``records`` is the dictionary of the records of all stages.
+    The key depends on the digests of the entries written by the
+    stages in ``stage.depends``; so these stages must have records.
+    """
+    h = hashlib.sha256()
+    h.update(repr((stage.name, stage.function, stage.outputs)).encode())
+    h.update(repr(sorted(stage.params.items())).encode())
+    h.update(repr(get_mmgroup_version()).encode())
+    for path in source_files([stage.function[0]] + list(stage.sources)):
+        with open(path, "rb") as f:
+            h.update(f.read())
+    for name in stage.depends:
+        _, outputs = records[name]
+        h.update(repr(sorted(outputs.items())).encode())
+    return h.hexdigest()
+
+
+def run_stage(stage):
+    """Run a stage"""
+    module_name, function_name = stage.function
+    module = importlib.import_module(module_name)
+    getattr(module, function_name)(**stage.params)
+
+
+def run_stages(shelve_name, stages, verbose = 0, force = (), times = None):
+    """Run all stages of a computation that are out of date
+
+    Here ``shelve_name`` is the name of the shelve storing the
+    results of the stages, and ``stages`` is the list of stages
+    of the computation, given as instances of class ``Stage``. A
+    stage must occur after all stages it depends on.
+
+    The function runs the stages in the given order. It returns
+    the list of the names of the stages that have been run.
+
+    The stages with names in the list ``force`` are run even if
+    they are up to date. If ``times`` is a dictionary then the
+    run time (in seconds) of each stage that has been run is
+    stored in that dictionary, with the name of the stage as key.
+    """
+    with shelve.open(shelve_name) as db:
+        records = db.get(STAGE_RECORDS, {})
+    done = []
+    names = set()
+    for stage in stages:
+        for name in stage.depends:
+            assert name in names, (stage.name, name)
+        names.add(stage.name)
+        key = stage_key(stage, records)
+        with shelve.open(shelve_name) as db:
+            ok = all(name in db for name in stage.outputs)
+        if (ok and stage.name in records and records[stage.name][0] == key
+                and stage.name not in force):
+            continue
+        if verbose:
+            print("Running stage %s" % stage.name)
+        t_start = time.perf_counter()
+        with span(stage.name, "stage"):
+            run_stage(stage)
+        if times is not None:
+            times[stage.name] = time.perf_counter() - t_start
+        with shelve.open(shelve_name) as db:
+            outputs = {name: digest(db[name]) for name in stage.outputs}
+            records[stage.name] = key, outputs
+            db[STAGE_RECORDS] = records
+        done.append(stage.name)
+    return done
+
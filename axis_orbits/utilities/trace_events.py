@@ -0,0 +1,157 @@
+r"""Record a trace of a computation in Chrome trace-event format
+
+If tracing is enabled with function ``enable_trace`` then the
+context manager ``span`` records the wall time, the CPU time, and
+the peak resident set size (RSS) of the current process for a part
+of a computation. The records are called events. Function
+``write_trace`` writes all events to a file in the Chrome
+trace-event format (JSON). Such a file can be displayed with the
+trace viewer of the Chrome browser (chrome://tracing) or with
+https://ui.perfetto.dev .
+
+Function ``run_tasks`` in module ``scheduler`` records an event
+for each task in the worker process running the task, and returns
+these events to the main process. It also records the utilization
+of each worker process during a call to ``run_tasks``.
+
+If tracing is not enabled then the overhead of the functions in
+this module is negligible.
+"""
+import os
+import time
+import json
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# True if tracing is enabled
+TRACING = False
+
+# List of the events recorded in the current process
+EVENTS = []
+
+
+def enable_trace(enable = True):
+    """Enable (or disable) tracing and delete all recorded events"""
+    global TRACING
+    TRACING = bool(enable)
+    del EVENTS[:]
+
+
+def tracing():
+    """Return True if tracing is enabled"""
+    return TRACING
+
+
+def peak_rss():
+    """Return peak resident set size of current process in kB
+
+    This is the peak over the lifetime of the process, not the
+    peak during a part of a computation.
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _us(t):
+    """Convert time ``t`` in seconds to an integer in microseconds"""
+    return int(round(t * 1.0e6))
+
+
+@contextmanager
+def span(name, cat = "compute", **args):
+    """Context manager recording an event for a part of a computation
+
+    Here ``name`` is the name and ``cat`` is the category of the
+    event. Keyword arguments are stored in the event and shown in
+    the trace viewer. The context manager yields a dictionary; the
+    entries of that dictionary are also stored in the event.
+
+    The event also contains the CPU time of the process spent in the
+    context, and the increase of the peak resident set size of the
+    process in the context. The latter is zero if the memory used in
+    the context does not exceed the peak reached before.
+    """
+    if not TRACING:
+        yield {}
+        return
+    args = dict(args)
+    t_start, cpu_start = time.perf_counter(), time.process_time()
+    rss_start = peak_rss()
+    try:
+        yield args
+    finally:
+        t_end = time.perf_counter()
+        args["cpu_time_s"] = round(time.process_time() - cpu_start, 6)
+        if rss_start is not None:
+            args["peak_rss_increase_kb"] = peak_rss() - rss_start
+        EVENTS.append({
+            "name": name, "cat": cat, "ph": "X",
+            "ts": _us(t_start), "dur": _us(t_end - t_start),
+            "pid": os.getpid(), "tid": 0, "args": args,
+        })
+
+
+def events_since(n):
+    """Remove and return the events recorded after the first ``n``"""
+    events = EVENTS[n:]
+    del EVENTS[n:]
+    return events
+
+
+def add_events(events):
+    """Add a list of events recorded in another process"""
+    EVENTS.extend(events)
+
+
+def utilization(events, t_start, t_end):
+    """Return the utilization of the processes in a list of events
+
+    The function returns a dictionary mapping the process ids
+    occuring in ``events`` to the fraction of the time between
+    ``t_start`` and ``t_end`` (given in seconds) covered by these
+    events.
+    """
+    busy = {}
+    for event in events:
+        pid = str(event["pid"])
+        busy[pid] = busy.get(pid, 0) + event["dur"]
+    wall = max(1, _us(t_end - t_start))
+    return {pid: round(t / wall, 3) for pid, t in busy.items()}
+
+
+def write_trace(path):
+    """Write all recorded events to file ``path`` in JSON format"""
+    main_pid = os.getpid()
+    pids = sorted(set(event["pid"] for event in EVENTS) | {main_pid})
+    meta = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+        "args": {"name": "main" if pid == main_pid else "worker"}}
+        for pid in pids]
+    with open(path, "wt") as f:
+        json.dump({"traceEvents": meta + EVENTS,
+            "displayTimeUnit": "ms"}, f)
+
+
+@contextmanager
+def trace_to_file(path):
+    """Context manager recording a trace and writing it to a file
+
+    If ``path`` is None then nothing is done. Otherwise tracing is
+    enabled and the recorded events are written to file ``path`` at
+    the end of the context, even if an exception has been raised.
+    """
+    if path is None:
+        yield
+        return
+    enable_trace()
+    try:
+        yield
+    finally:
+        write_trace(path)
+        print("Trace written to file '%s'" % path)
+        enable_trace(False)
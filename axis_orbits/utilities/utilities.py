@@ -7,6 +7,8 @@ import numpy as np
 from mmgroup import MM0, XLeech2, mat24, MM, Xsp2_Co1
 from mmgroup.general import Orbit_Lin2
 from mmgroup.general import Orbit_Elem2
+from mmgroup.generators import gen_leech2_mul, gen_leech2_op_word
+from mmgroup.generators import gen_leech2_scalprod
 from collections.abc import Iterable
 
 ######################################################################
@@ -31,6 +33,79 @@ def map_x(g):
     x = XLeech2(g)
     return x.ord & 0xffffff
 
+def map_leech2(v):
+    return v & 0xffffff
+
+
+def Q_x0_structure(glist):
+    r"""Compute the intersection of a 2-subgroup of :math`N_{x0}` with Q_x0
+
+    Let :math:`K` be the subgroup of the 2-group :math:`2^{2+11+22}`
+    generated by the list ``glist`` of elements of that 2-group. The
+    function returns a triple ``(e_y, e_central, basis)``. Here
+    :math:`2^{e_y}` is the order of the image of :math:`K` in the
+    group of the elements :math:`y_d`. The intersection of :math:`K`
+    with :math:`Q_{x0}` has image of order :math:`2^{len(basis)}` in
+    the Leech lattice mod 2; the list ``basis`` contains a basis of
+    that image, with elements of :math:`Q_{x0}` encoded as integers
+    as in class ``XLeech2``. ``e_central`` is 1 if :math:`x_{-1}` is
+    in :math:`K` and 0 otherwise.
+
+    The computation is deterministic. We perform Gaussian elimination
+    on the images of the generators in the group of the elements
+    :math:`y_d`. This yields elements :math:`p_i` of :math:`K` whose
+    images form a basis of that group; and it maps the remaining
+    generators into :math:`Q_{x0}`. The intersection of :math:`K`
+    with :math:`Q_{x0}` is the smallest subgroup of :math:`Q_{x0}`
+    containing these remaining generators, the squares
+    :math:`p_i^2` and the commutators :math:`[p_i, p_j]`, which is
+    invariant under conjugation with all elements :math:`p_i`. We
+    compute that subgroup by Gaussian elimination in :math:`Q_{x0}`.
+    """
+    pivots = OrderedDict()
+    q_elements = []
+    for g in glist:
+        g = Xsp2_Co1(g)
+        y = map_y(g)
+        while y:
+            b = y.bit_length() - 1
+            if not b in pivots:
+                break
+            y_p, p = pivots[b]
+            y ^= y_p
+            g = g * p
+        if y:
+            pivots[b] = y, g
+        else:
+            q_elements.append(XLeech2(g).ord)
+    p_list = [p for _, p in pivots.values()]
+    for i, p in enumerate(p_list):
+        q_elements.append(XLeech2(p * p).ord)
+        for p1 in p_list[:i]:
+            q_elements.append(XLeech2(p**-1 * p1**-1 * p * p1).ord)
+    words = [p.mmdata for p in p_list]
+    basis = OrderedDict()
+    central = 0
+    while len(q_elements):
+        v = int(q_elements.pop())
+        while v & 0xffffff:
+            b = (v & 0xffffff).bit_length() - 1
+            if not b in basis:
+                break
+            v = int(gen_leech2_mul(v, basis[b]))
+        if v & 0xffffff:
+            basis[b] = v
+            q_elements += [gen_leech2_op_word(v, w, len(w)) for w in words]
+        else:
+            central |= v
+    basis = list(basis.values())
+    for i, v in enumerate(basis):
+        central |= gen_leech2_mul(v, v)
+        for w in basis[:i]:
+            if gen_leech2_scalprod(v, w):
+                central |= 0x1000000
+    return len(p_list), int(central != 0), basis
+
 
 def is_Nx0_odd(g):
     r"""Return 0 or 1 if ``g`` is an even or odd element of :math`N_{x0}`
@@ -48,6 +123,31 @@ def is_Nx0_odd(g):
 
 
 
+# Number of entries of a row of an array created by function
+# ``Nx0_to_array``. This is the maximum length of the data of an
+# element of N_x0 as an instance of class ``Xsp2_Co1``.
+NX0_DATA_LENGTH = 10
+
+def Nx0_to_array(glist):
+    r"""Convert a list of elements of :math`N_{x0}` to a numpy array
+
+    The function returns an array ``a`` of shape ``(len(glist), 10)``
+    and type ``np.uint32``. Row ``a[i]`` contains the data of element
+    ``glist[i]`` as an instance of class ``Xsp2_Co1``, padded with
+    zeros. Function ``array_to_Nx0`` converts ``a`` back to a list
+    of instances of class ``Xsp2_Co1``.
+    """
+    a = np.zeros((len(glist), NX0_DATA_LENGTH), dtype = np.uint32)
+    for i, g in enumerate(glist):
+        data = Xsp2_Co1(g).mmdata
+        a[i, :len(data)] = data
+    return a
+
+def array_to_Nx0(a):
+    r"""Inverse of function ``Nx0_to_array``"""
+    return [Xsp2_Co1('a', data) for data in a]
+
+
 def trim_N_x0(glist, map = lambda x:x):
     r"""Rearrange list of elements of a subgroup of :math`N_{x0}`.  
 
@@ -115,15 +215,9 @@ def order_Nx0(glist, e_odd = True):
         glist = glist[odd:]
     orb_m24 = Orbit_Lin2(map_mat24, glist)   
     factor_pi, stab = orb_m24.order_kernel(n_gen = 40)
-    orbit_y = Orbit_Elem2(map_y, stab)
-    orbit_y.set_rand_parameters(50, 100)
-    e_y = orbit_y.exp
-    stab_x = [XLeech2(orbit_y.rand_kernel()) for i in range(35)]
-    orbit_x = Orbit_Elem2(map_x, stab_x)
-    orbit_x.set_rand_parameters(50, 100)
+    e_y, e_central, basis_x = Q_x0_structure(stab)
+    orbit_x = Orbit_Elem2(map_leech2, basis_x)
     e_x = orbit_x.structure_2([(23, 24), (0, 11), (12, 23), (11, 12)]) 
-    stab_central = set([orbit_x.rand_kernel().ord  for i in range(35)])
-    e_central = int(len(stab_central) > 1)
     e = [e_central] + e_x[:3] + [e_y]
     if e_odd:
         assert e_x[3] == 0, e_x
@@ -147,6 +241,16 @@ def compute_order(lin2_orbit, verbose = 0):
     return (1 << e[0], 1 << (sum(e[1:-1]) + s), 
         (factor1 * order_m24) << e[-1])
 
+
+def parity(a):
+    """Return the bit parities of the entries of a uint32 array"""
+    a = a ^ (a >> 16)
+    a ^= a >> 8
+    a ^= a >> 4
+    a ^= a >> 2
+    a ^= a >> 1
+    return a & 1
+
 ######################################################################
 # Convert elements of N_0 to GAP permutations
 ######################################################################
@@ -1,7 +1,13 @@
 import sys
 import os
-from collections import defaultdict, OrderedDict
+import io
 import re
+import time
+import json
+import queue
+import hashlib
+import threading
+from collections import defaultdict, OrderedDict
 import numpy as np
 import subprocess
 
@@ -72,6 +78,46 @@ Print("split = ", SPLIT, "\\n");
 ######################################################################
 
 
+def print_group_program(i, c, order, f):
+    """Write GAP code for computing the structure of a group
+
+    The group G{i} is generated by the elements of the list ``c``
+    of elements of N_x0; ``order`` is the order of that group.
+    The GAP code is written to file ``f``.
+    """
+    small_order = order <= 1000 and order % 256 != 0
+    small_order_nice = order <= 1000 and order % 256 != 0
+    small_order_nice |= order <= 10000 and order % 128 != 0
+    #tag, lst = find_substructure(c) if sub else ("", [])
+    #conj = AutPL(0, zip(lst, range(5)), 0) if tag else None
+    odd = is_Nx0_odd(c[0])
+    g = MM_to_GAP(c[odd:])
+    #print(i, order, small_order_nice)
+    nice = ":nice" if small_order_nice  else ""
+    print(f"""G{i} := Group(
+{g});;
+# G{i} should have order {order}
+Print("G{i} = ", StructureDescription(G{i}{nice}), "\\n");
+Print("order = ", Order(G{i}), "\\n");
+Print("small = {str(bool(small_order_nice)).lower()}\\n"); 
+""", file = f, end = "")
+    subgroups_o2("G"+str(i),  f)
+    if small_order:
+        print(f'Print("Id = ", IdSmallGroup(G{i}), "\\n");',
+            file = f)
+    print("", file = f)
+
+
+def group_program(i, c, order):
+    """Return GAP code for computing the structure of a group
+
+    Parameters are as in function ``print_group_program``.
+    """
+    f = io.StringIO()
+    print_group_program(i, c, order, f)
+    return f.getvalue()
+
+
 def create_input_for_gap(centralizers, orders, f_in):
     with open(f_in,"wt") as f:
         print("# This is a GAP program.")
@@ -79,27 +125,7 @@ def create_input_for_gap(centralizers, orders, f_in):
         sample_upper_central_series(f)
         #std_centralizers_gap(f)
         for i, (c, order) in enumerate(zip(centralizers, orders)):
-            small_order = order <= 1000 and order % 256 != 0
-            small_order_nice = order <= 1000 and order % 256 != 0
-            small_order_nice |= order <= 10000 and order % 128 != 0
-            #tag, lst = find_substructure(c) if sub else ("", [])
-            #conj = AutPL(0, zip(lst, range(5)), 0) if tag else None
-            odd = is_Nx0_odd(c[0])
-            g = MM_to_GAP(c[odd:])
-            #print(i, order, small_order_nice)
-            nice = ":nice" if small_order_nice  else ""
-            print(f"""G{i} := Group(
-{g});;
-# G{i} should have order {order}
-Print("G{i} = ", StructureDescription(G{i}{nice}), "\\n");
-Print("order = ", Order(G{i}), "\\n");
-Print("small = {str(bool(small_order_nice)).lower()}\\n"); 
-""", file = f, end = "")
-            subgroups_o2("G"+str(i),  f)
-            if small_order:
-                print(f'Print("Id = ", IdSmallGroup(G{i}), "\\n");',
-                    file = f)
-            print("", file = f)
+            print_group_program(i, c, order, f)
 
 
 ######################################################################
@@ -138,7 +164,12 @@ MATCHES = [
 
 
 def iter_parse_gap_output(filename, verbose = 1):
-    for s in open(filename, "rt").readlines():
+    with open(filename, "rt") as f:
+        yield from iter_parse_gap_lines(f.readlines(), verbose)
+
+
+def iter_parse_gap_lines(lines, verbose = 1):
+    for s in lines:
         if verbose:
             print(s, end = "")
         for m, tag, fmt in MATCHES:
@@ -302,15 +333,29 @@ class GapInfo:
 
 
 def parse_gap_output(filename, verbose = 0):
+    with open(filename, "rt") as f:
+        return parse_gap_lines(f.readlines(), verbose)
+
+
+def parse_gap_lines(lines, verbose = 0, first = 0):
+    """Parse the output lines of a GAP program
+
+    The GAP program must have been created with function
+    ``create_input_for_gap``, or it must be a sequence of programs
+    created by function ``group_program`` for groups with
+    consecutive numbers starting with ``first``. The function
+    returns a dictionary mapping the numbers of the groups to
+    objects of class ``GapInfo``.
+    """
     data = []
     no = None
     c_list = o2_prod = None
-    for s in iter_parse_gap_output(filename, verbose > 1):
+    for s in iter_parse_gap_lines(lines, verbose > 1):
         if verbose > 1:
             print(s)
         tag = s[0]
         if tag == 'g':
-            no = len(data)
+            no = first + len(data)
             g = GapInfo()
             data.append(g)
             g.no, g.structure = s[1:]
@@ -418,6 +463,368 @@ Please switch to directory "{dir}" and run
 
 
 
+######################################################################
+# Run GAP programs in GAP sessions
+######################################################################
+
+# Line printed by GAP after running a program in a session
+GAP_END = "@@GAP_END@@"
+
+# Default time limit (in seconds) for computing the structure of a group
+GAP_TIMEOUT = 1800
+
+
+def gap_command():
+    """Return the command line for starting GAP in a session"""
+    args = ["gap", "-b", "-q", "--quitonbreak"]
+    if sys.platform.startswith("win"):
+        args = ["wsl"] + args
+    return args
+
+
+class GapSession:
+    """A GAP process running programs sent over a pipe
+
+    Method ``run`` sends a GAP program to the process and returns
+    the output of that program. So a GAP process may run many
+    programs without being restarted. If GAP runs into an error
+    then the process terminates, and ``run`` raises RuntimeError.
+    """
+    def __init__(self):
+        self.process = subprocess.Popen(gap_command(),
+            stdin = subprocess.PIPE, stdout = subprocess.PIPE,
+            stderr = subprocess.STDOUT, text = True, bufsize = 1)
+        self.lines = queue.Queue()
+        self.reader = threading.Thread(target = self._read, daemon = True)
+        self.reader.start()
+        self.run('LoadPackage("smallgrp");;')
+
+    def _read(self):
+        for line in self.process.stdout:
+            self.lines.put(line)
+        self.lines.put(None)
+
+    def run(self, program, timeout = None):
+        """Run a GAP program and return its output as a list of lines
+
+        If the program does not terminate within ``timeout`` seconds
+        then the GAP process is killed and TimeoutError is raised.
+        """
+        try:
+            self.process.stdin.write(program)
+            self.process.stdin.write('\nPrint("%s\\n");\n' % GAP_END)
+            self.process.stdin.flush()
+        except OSError:
+            self.close()
+            raise RuntimeError("GAP process has terminated")
+        deadline = None if timeout is None else time.time() + timeout
+        output = []
+        while True:
+            t = None if deadline is None else max(0, deadline - time.time())
+            try:
+                line = self.lines.get(timeout = t)
+            except queue.Empty:
+                self.close()
+                raise TimeoutError("GAP timed out after %s s" % timeout)
+            if line is None:
+                self.close()
+                err = "GAP process has terminated:\n" + "".join(output[-5:])
+                raise RuntimeError(err)
+            if line.strip() == GAP_END:
+                return output
+            output.append(line)
+
+    def close(self):
+        """Terminate the GAP process"""
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            self.process.kill()
+        self.process.wait()
+
+
+######################################################################
+# Cache for the structures of groups computed by GAP
+######################################################################
+
+# Version of the GAP programs created by function ``group_program``.
+# This must be increased whenever these programs are changed.
+GAP_CACHE_VERSION = 1
+
+# Attributes of class GapInfo stored in the cache
+GAP_INFO_FIELDS = ["order", "id", "small", "structure", "o2", "o2_str",
+    "o2_factor", "split"]
+
+
+def gap_fingerprint(c, order):
+    """Return a fingerprint of a group for the cache of GAP results
+
+    Here the group is given by a list ``c`` of generators in N_x0,
+    and ``order`` is the order of the group, as in function
+    ``group_program``. The fingerprint depends on the order and
+    on the set of the permutations (in GAP notation) generating
+    the group that is passed to GAP. So it does not depend on the
+    number of the group or on the order of the generators.
+    """
+    odd = is_Nx0_odd(c[0])
+    perms = sorted(set(MM_to_GAP(x) for x in c[odd:]))
+    data = repr((GAP_CACHE_VERSION, int(order), perms))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def gap_cache_file(output_file):
+    """Return name of the cache file for a file containing GAP output"""
+    root, ext = os.path.splitext(output_file)
+    return root + "_cache.json"
+
+
+def load_gap_cache(cache_file):
+    """Load the cache of the structures of groups computed by GAP
+
+    The file ``cache_file`` contains one record in JSON format per
+    line. A record is a dictionary with entries "key" (fingerprint
+    of a group computed by function ``gap_fingerprint``) and "info"
+    (dictionary with the attributes of the object of class
+    ``GapInfo`` describing that group). The function returns a
+    dictionary mapping the fingerprints to these dictionaries.
+    """
+    cache = {}
+    if not os.path.isfile(cache_file):
+        return cache
+    with open(cache_file, "rt") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue   # the last line may be truncated
+            cache[record["key"]] = record["info"]
+    return cache
+
+
+def store_gap_cache(cache_file, key, info):
+    """Append the structure of a group to the cache of GAP results
+
+    Here ``key`` is the fingerprint of the group, and ``info`` is
+    the object of class ``GapInfo`` describing the group.
+    """
+    d = {name: getattr(info, name) for name in GAP_INFO_FIELDS}
+    with open(cache_file, "at") as f:
+        f.write(json.dumps({"key": key, "info": d}) + "\n")
+
+
+def cached_gap_info(no, d):
+    """Return object of class ``GapInfo`` for group ``no`` from cache
+
+    Here ``d`` is the dictionary describing the group in the cache.
+    """
+    info = GapInfo()
+    info.no = no
+    for name in GAP_INFO_FIELDS:
+        setattr(info, name, d.get(name))
+    return info
+
+
+def gap_info_lines(info):
+    """Return the output of GAP for a group as a list of lines
+
+    Here ``info`` is the object of class ``GapInfo`` describing the
+    group. The lines are in the format of the output of the program
+    created by function ``group_program``, so that function
+    ``parse_gap_lines`` recovers ``info`` from these lines.
+    """
+    def str_bool(b):
+        return str(bool(b)).lower()
+    no = info.no
+    lines = ["G%d = %s" % (no, info.structure)]
+    if info.order is not None:
+        lines.append("order = %d" % info.order)
+    if info.small is not None:
+        lines.append("small = %s" % str_bool(info.small))
+    if info.o2 is not None:
+        lines.append("O2G%d has upper central series:" % no)
+        o2_order = 1
+        for factor in reversed(info.o2):
+            lines.append(" x ".join(["C%d" % x for x, e in factor
+                for k in range(e)]))
+            for x, e in factor:
+                o2_order *= x ** e
+        lines.append("and order %d" % o2_order)
+    if info.o2_factor is not None:
+        lines.append("G%d/O2G%d = %s" % (no, no, info.o2_factor))
+    if info.split is not None:
+        lines.append("split = %s" % str_bool(info.split))
+    if info.id is not None:
+        lines.append("Id = %s" % info.id)
+    return [line + "\n" for line in lines]
+
+
+######################################################################
+# Run GAP programs for many groups in a pool of GAP sessions
+######################################################################
+
+
+def iter_gap_pool(centralizers, orders, cache_file, processes = 1,
+        timeout = GAP_TIMEOUT, failed = None):
+    """Compute the structure of groups in a pool of GAP sessions
+
+    Here ``centralizers`` is a list of groups, each given by a list
+    of generators in N_x0, and ``orders`` is the list of the orders
+    of these groups. For each group we run the GAP program created
+    by function ``group_program``. The programs are distributed to
+    ``processes`` instances of class ``GapSession``, largest groups
+    first, with a time limit of ``timeout`` seconds per group.
+
+    The function yields pairs ``(i, info)`` as soon as the structure
+    of group ``i`` is known; here ``info`` is an object of class
+    ``GapInfo`` describing that structure.
+
+    The structures computed by GAP are stored in the file
+    ``cache_file``, see function ``load_gap_cache``. GAP is run only
+    for the groups not found in that file. If the computation for a
+    group fails or times out then its number is appended to the list
+    ``failed`` (if given), and the computation proceeds with the
+    next group. All GAP processes are terminated when the generator
+    is exhausted or closed, or when an exception is raised.
+    """
+    keys = [gap_fingerprint(c, order)
+        for c, order in zip(centralizers, orders)]
+    cache = load_gap_cache(cache_file)
+    pending = queue.Queue()
+    for i in sorted(range(len(keys)), key = lambda i: -orders[i]):
+        if keys[i] in cache:
+            yield i, cached_gap_info(i, cache[keys[i]])
+        else:
+            pending.put(i)
+    n_pending = pending.qsize()
+    n_sessions = max(0, min(processes, n_pending))
+    if n_pending:
+        print("Running GAP for %d of %d groups in %d GAP processes" %
+            (n_pending, len(keys), n_sessions))
+    results = queue.Queue()
+    lock = threading.Lock()
+    # All GAP sessions started, and an event telling the threads
+    # to stop. Both are used for shutting down the sessions.
+    sessions = []
+    stop = threading.Event()
+
+    def new_session():
+        session = GapSession()
+        with lock:
+            sessions.append(session)
+            if stop.is_set():
+                session.close()
+        return session
+
+    def worker(session):
+        try:
+            while not stop.is_set():
+                try:
+                    i = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if session is None:
+                    session = new_session()
+                program = group_program(i, centralizers[i], orders[i])
+                try:
+                    output = session.run(program, timeout)
+                except (TimeoutError, RuntimeError) as e:
+                    if stop.is_set():
+                        break
+                    print("Computation of group G%d failed: %s" % (i, e))
+                    session = None
+                    results.put((i, None))
+                    continue
+                info = parse_gap_lines(output, first = i)[i]
+                with lock:
+                    store_gap_cache(cache_file, keys[i], info)
+                results.put((i, info))
+            if session is not None:
+                session.close()
+        except BaseException as e:
+            results.put((None, e))
+
+    threads = []
+    try:
+        # Start the first sessions here, so that errors in launching
+        # GAP are reported in the calling thread.
+        for k in range(n_sessions):
+            threads.append(threading.Thread(target = worker,
+                args = (new_session(),), daemon = True))
+        for thread in threads:
+            thread.start()
+        for k in range(n_pending):
+            i, info = results.get()
+            if i is None:
+                raise info
+            if info is None:
+                if failed is not None:
+                    failed.append(i)
+                continue
+            yield i, info
+    finally:
+        # Terminate all GAP processes, also if the computation has
+        # failed or has been abandoned by the caller.
+        stop.set()
+        with lock:
+            for session in sessions:
+                session.close()
+        for thread in threads:
+            if thread.ident is not None:
+                thread.join()
+
+
+def run_gap_pool(centralizers, orders, output_file, processes = 1,
+        timeout = GAP_TIMEOUT, input_file = None):
+    """Compute the structure of groups in a pool of GAP sessions
+
+    Parameters ``centralizers``, ``orders``, ``processes`` and
+    ``timeout`` are as in function ``iter_gap_pool``. The structures
+    are cached in the file returned by function ``gap_cache_file``.
+    If the structures of all groups are known then the function
+    writes them to file ``output_file`` in the format of the output
+    of function ``run_gap``, and returns True. Otherwise it returns
+    False, and it leaves an existing file ``output_file`` unchanged;
+    then a subsequent call runs GAP for the missing groups only. If
+    GAP cannot be launched then the function prints a command for
+    running GAP manually and returns False.
+    """
+    failed = []
+    infos = {}
+    n = len(centralizers)
+    cache_file = gap_cache_file(output_file)
+    results = iter_gap_pool(centralizers, orders, cache_file,
+        processes, timeout, failed)
+    try:
+        for i, info in results:
+            infos[i] = info
+    except OSError:
+        prog = " ".join(gap_command()[:-3])
+        if input_file:
+            prog += " -g <%s >%s" % (input_file, output_file)
+        print(f"""
+Launching GAP failed!
+Please run
+{prog}
+""")
+        return False
+    finally:
+        results.close()
+    if len(failed):
+        print("GAP failed for groups %s" % sorted(failed))
+        print("Results for the other groups are stored in file\n"
+            + cache_file)
+        return False
+    tmp_file = output_file + ".%d.tmp" % os.getpid()
+    with open(tmp_file, "wt") as f:
+        for i in range(n):
+            f.writelines(gap_info_lines(infos[i]))
+    os.replace(tmp_file, output_file)
+    print("Structures of %d groups written to file\n%s" % (n, output_file))
+    return True
+
+
 ######################################################################
 # Test function ``parse_gap_output`` of this module
 ######################################################################